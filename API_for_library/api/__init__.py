@@ -1,12 +1,28 @@
+import os
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 
+from API_for_library.audit import audit_log
+from API_for_library.app.auth.generate_password import password_hasher
+from API_for_library.app.auth.generate_token import jwt_service
+from API_for_library.db.session import dispose_engine, get_replica_engine, init_engine
+from API_for_library.db.warmup import warm_up
 
 from API_for_library.app.user import user_router
 from API_for_library.app.books import books_router
 from API_for_library.app.author import author_router
 from API_for_library.app.auth import auth_router
 from API_for_library.app.Issue import issue_router
+from API_for_library.app.monitoring import metrics_router, monitoring_router
+from API_for_library.metrics import (
+    MetricsMiddleware,
+    mark_dead_processes,
+    mark_process_dead,
+)
+from main import DB_WARMUP_CONNECTIONS
 
 
 def init_cors(api: FastAPI) -> None:
@@ -25,6 +41,31 @@ def init_routers(api: FastAPI) -> None:
     api.include_router(author_router)
     api.include_router(auth_router)
     api.include_router(issue_router)
+    api.include_router(monitoring_router)
+    api.include_router(metrics_router)
+
+
+@asynccontextmanager
+async def lifespan(api: FastAPI):
+    """
+    Запуск и остановка приложения.
+
+    uvicorn не принимает запросы, пока не завершится старт: к этому моменту
+    ключи JWT разобраны, а пул уже держит прогретые соединения.
+    """
+    mark_dead_processes()
+    engine = init_engine()
+    jwt_service.load_keys()
+    await warm_up(engine, DB_WARMUP_CONNECTIONS)
+    replica = get_replica_engine()
+    if replica is not None:
+        await warm_up(replica, DB_WARMUP_CONNECTIONS)
+    await audit_log.start()
+    yield
+    await audit_log.stop()
+    password_hasher.shutdown()
+    await dispose_engine()
+    mark_process_dead(os.getpid())
 
 
 def create_api():
@@ -33,12 +74,13 @@ def create_api():
         version="1.0.0",
         docs_url="/docs",
         redoc_url="/redoc",
+        lifespan=lifespan,
+        default_response_class=ORJSONResponse,
     )
 
     init_routers(api)
     init_cors(api)
+    api.add_middleware(MetricsMiddleware)
 
     return api
 
-
-api = create_api()
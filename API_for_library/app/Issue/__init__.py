@@ -1,18 +1,18 @@
 from fastapi import APIRouter, HTTPException, Depends, status
 from uuid import UUID
-from datetime import timedelta
-import datetime
 
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from API_for_library.models.issue import Issue
-from API_for_library.models.books import Books
 from API_for_library.models.user import User
-from API_for_library.models.logs import Logs
+from API_for_library.audit import audit_log
 from API_for_library.db.repository import DatabaseRepository
 from API_for_library.db.session import get_session
-from ..books import get_books_repository
+from API_for_library.metrics import CIRCULATION_OPERATIONS, count_circulation
 from ..author import check_user
+from .circulation import CirculationService
+from .dto import IssueBatchRequest, ReturnBatchRequest, BatchResponse, IssueResponse
+from ..responses import dto_response
 
 issue_router = APIRouter(prefix="/issues", tags=["issues"])
 
@@ -23,14 +23,77 @@ def get_issue_repository(
     return DatabaseRepository(model=Issue, session=session)
 
 
-def get_log_repository(
+def get_circulation_service(
     session: AsyncSession = Depends(get_session),
-) -> DatabaseRepository[Logs]:
-    return DatabaseRepository(model=Logs, session=session)
+) -> CirculationService:
+    return CirculationService(session)
+
+
+@issue_router.post(
+    "/batch",
+    response_model=BatchResponse,
+    responses={
+        status.HTTP_200_OK: {"description": "Per-book checkout results."},
+    },
+)
+async def issue_books_batch(
+    data: IssueBatchRequest,
+    circulation: CirculationService = Depends(get_circulation_service),
+    user: User = Depends(check_user),
+):
+    """Выдать несколько книг одному пользователю за один запрос"""
+    try:
+        results = await circulation.issue_many(data.user_id, data.book_ids, data.days)
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Error issuing books: {str(e)}",
+        )
+    count_circulation("issue", results)
+    for item in results:
+        if item["ok"]:
+            audit_log.log_after_commit(
+                circulation.session,
+                "ISSUE",
+                f"Book {item['id']} issued to user {data.user_id}",
+            )
+    return dto_response(BatchResponse, {"results": results})
+
+
+@issue_router.post(
+    "/return/batch",
+    response_model=BatchResponse,
+    responses={
+        status.HTTP_200_OK: {"description": "Per-issue return results."},
+    },
+)
+async def return_books_batch(
+    data: ReturnBatchRequest,
+    circulation: CirculationService = Depends(get_circulation_service),
+    user: User = Depends(check_user),
+):
+    """Вернуть несколько книг за один запрос"""
+    try:
+        results = await circulation.return_many(data.issue_ids)
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Error returning books: {str(e)}",
+        )
+    count_circulation("return", results)
+    for item in results:
+        if item["ok"]:
+            audit_log.log_after_commit(
+                circulation.session,
+                "RETURN",
+                f"Book {item['issue']['book_id']} returned by user {item['issue']['user_id']}",
+            )
+    return dto_response(BatchResponse, {"results": results})
 
 
 @issue_router.post(
     "/{book_id}",
+    response_model=IssueResponse,
     responses={
         status.HTTP_201_CREATED: {"description": "Book issued successfully."},
         status.HTTP_400_BAD_REQUEST: {
@@ -41,62 +104,24 @@ def get_log_repository(
 async def issue_book(
     book_id: UUID,
     user_id: UUID,
-    issue_repo: DatabaseRepository[Issue] = Depends(get_issue_repository),
-    book_repo: DatabaseRepository[Books] = Depends(get_books_repository),
-    logs_repo: DatabaseRepository[Logs] = Depends(get_log_repository),
+    circulation: CirculationService = Depends(get_circulation_service),
     user: User = Depends(check_user),
-    db: AsyncSession = Depends(get_session),
     days: int = 14,
 ):
     """Выдать книгу пользователю"""
     try:
-        user_repo = DatabaseRepository(User, db)
-        user = await user_repo.filter(User.id == user_id)
-
-        if not user[0]:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND, detail="User not found"
-            )
-
-        issued_books = user[0].books_count
-        if issued_books >= 5:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="User has already issued 5 books",
-            )
-
-        book = await book_repo.get(book_id)
-        if not book or book.counter <= 0:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST, detail="Book is not available"
-            )
+        issue = await circulation.issue(book_id, user_id, days)
+        CIRCULATION_OPERATIONS.labels("issue", "ok").inc()
 
-        issue_date = datetime.date.today()
-        return_date = issue_date + timedelta(days=days)
-
-        issue_data = {
-            "book_id": book_id,
-            "user_id": user_id,
-            "issue_date": issue_date,
-            "return_date": return_date,
-            "returned": False,
-        }
-
-        book.counter -= 1
-        issued_books += 1
-        await book_repo.update(book.id, {"counter": book.counter})
-        await user_repo.update(user[0].id, {"books_count": issued_books})
-
-        await logs_repo.create(
-            {
-                "event_type": "ISSUE",
-                "description": f"Book {book_id} issued to user {user_id}",
-                "timestamp": datetime.datetime.now(),
-            }
+        audit_log.log_after_commit(
+            circulation.session,
+            "ISSUE",
+            f"Book {book_id} issued to user {user_id}",
         )
 
-        return await issue_repo.create(issue_data)
+        return dto_response(IssueResponse, issue)
     except Exception as e:
+        CIRCULATION_OPERATIONS.labels("issue", "failed").inc()
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=f"Error retrieving books: {str(e)}",
@@ -112,54 +137,23 @@ async def issue_book(
 )
 async def return_book(
     issue_id: UUID,
-    db: AsyncSession = Depends(get_session),
-    issue_repo: DatabaseRepository[Issue] = Depends(get_issue_repository),
-    book_repo: DatabaseRepository[Books] = Depends(get_books_repository),
-    logs_repo: DatabaseRepository[Logs] = Depends(get_log_repository),
+    circulation: CirculationService = Depends(get_circulation_service),
     user: User = Depends(check_user),
 ):
     """Обработчик для возврата книги пользователем"""
     try:
-        issue: Issue = await issue_repo.get(issue_id)
-        if not issue:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND, detail="Issue not found"
-            )
-
-        if issue.returned:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Book is already returned",
-            )
-
-        book: Books = await book_repo.get(issue.book_id)
-        if not book:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND, detail="Book not found"
-            )
+        issue = await circulation.return_book(issue_id)
+        CIRCULATION_OPERATIONS.labels("return", "ok").inc()
 
-        book.counter += 1
-        await book_repo.update(book.id, {"counter": book.counter})
-        await issue_repo.update(issue.id, {"returned": True})
-
-        user_repo = DatabaseRepository(User, db)
-        user = await user_repo.filter(User.id == issue.user_id)
-        if not user[0]:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND, detail="User not found"
-            )
-        await user_repo.update(user[0].id, {"books_count": user[0].books_count - 1})
-
-        await logs_repo.create(
-            {
-                "event_type": "RETURN",
-                "description": f"Book {issue.book_id} returned by user {issue.user_id}",
-                "timestamp": datetime.datetime.now(),
-            }
+        audit_log.log_after_commit(
+            circulation.session,
+            "RETURN",
+            f"Book {issue['book_id']} returned by user {issue['user_id']}",
         )
 
         return {"message": "Book returned successfully."}
     except Exception as e:
+        CIRCULATION_OPERATIONS.labels("return", "failed").inc()
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=f"Error retrieving books: {str(e)}",
@@ -0,0 +1,276 @@
+import datetime
+import uuid
+from datetime import timedelta
+from functools import partial
+from typing import List, Tuple
+
+from sqlalchemy import select, update, insert, literal, func, true
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from API_for_library.cache.catalog import books_cache
+from API_for_library.db.session import after_commit, use_primary
+from API_for_library.models.issue import Issue
+from API_for_library.models.books import Books
+from API_for_library.models.user import User
+
+MAX_ISSUED_BOOKS = 5
+
+
+class CirculationService:
+    """
+    Выдача и возврат книг одним запросом к базе.
+
+    Проверки делаются условными UPDATE ... RETURNING внутри CTE, поэтому
+    параллельные выдачи одной книги не гоняются друг с другом: счетчик
+    уменьшается только если он еще больше нуля.
+
+    Все запросы сервиса идут на primary: записи спрятаны в SELECT из CTE,
+    а проверки причин отказа должны видеть только что сделанное.
+    """
+
+    def __init__(self, session: AsyncSession) -> None:
+        self.session = session
+        use_primary(session)
+
+    async def issue(self, book_id: uuid.UUID, user_id: uuid.UUID, days: int) -> dict:
+        """Выдать книгу пользователю"""
+        issue_date = datetime.date.today()
+        return_date = issue_date + timedelta(days=days)
+
+        reader = (
+            update(User)
+            .where(User.id == user_id, User.books_count < MAX_ISSUED_BOOKS)
+            .values(books_count=User.books_count + 1)
+            .returning(User.id)
+            .cte("reader")
+        )
+        book = (
+            update(Books)
+            .where(Books.id == book_id, Books.counter > 0)
+            .values(counter=Books.counter - 1)
+            .returning(Books.id)
+            .cte("book")
+        )
+        new_issue = (
+            insert(Issue)
+            .from_select(
+                ["id", "book_id", "user_id", "issue_date", "return_date", "returned"],
+                select(
+                    func.gen_random_uuid(),
+                    book.c.id,
+                    reader.c.id,
+                    literal(issue_date),
+                    literal(return_date),
+                    literal(False),
+                ).select_from(book.join(reader, true())),
+            )
+            .returning(*Issue.__table__.c)
+            .cte("new_issue")
+        )
+
+        result = await self.session.execute(select(new_issue))
+        row = result.mappings().one_or_none()
+        if row is None:
+            await self.session.rollback()
+            raise ValueError(await self._issue_failure_reason(book_id, user_id))
+        after_commit(self.session, partial(books_cache.pop, str(book_id)))
+        return dict(row)
+
+    async def return_book(self, issue_id: uuid.UUID) -> dict:
+        """Вернуть книгу по id выдачи"""
+        rows = await self._return_issues([issue_id])
+        if not rows:
+            raise ValueError(await self._return_failure_reason(issue_id))
+        return rows[0]
+
+    async def issue_many(
+        self, user_id: uuid.UUID, book_ids: List[uuid.UUID], days: int
+    ) -> List[dict]:
+        """
+        Выдать несколько книг одному читателю.
+
+        Читатель блокируется на время транзакции, затем одним запросом
+        уменьшаются счетчики доступных книг (не больше, чем позволяет лимит),
+        увеличивается books_count и вставляются все выдачи. Результат по
+        каждой книге в порядке запроса.
+        """
+        results, unique_ids = _dedupe(book_ids)
+        books_count = (
+            await self.session.execute(
+                select(User.books_count).where(User.id == user_id).with_for_update()
+            )
+        ).scalar_one_or_none()
+        if books_count is None:
+            return _fail_all(results, unique_ids, "User not found")
+        capacity = MAX_ISSUED_BOOKS - books_count
+        if capacity <= 0:
+            return _fail_all(
+                results, unique_ids, f"User has already issued {MAX_ISSUED_BOOKS} books"
+            )
+
+        issue_date = datetime.date.today()
+        return_date = issue_date + timedelta(days=days)
+        requested = literal(unique_ids, ARRAY(Books.id.type))
+        picked = (
+            select(Books.id)
+            .where(Books.id.in_(unique_ids), Books.counter > 0)
+            .order_by(func.array_position(requested, Books.id))
+            .limit(capacity)
+            .cte("picked")
+        )
+        book = (
+            update(Books)
+            .where(Books.id.in_(select(picked.c.id)), Books.counter > 0)
+            .values(counter=Books.counter - 1)
+            .returning(Books.id)
+            .cte("book")
+        )
+        reader = (
+            update(User)
+            .where(User.id == user_id)
+            .values(
+                books_count=User.books_count
+                + select(func.count()).select_from(book).scalar_subquery()
+            )
+            .returning(User.id)
+            .cte("reader")
+        )
+        new_issues = (
+            insert(Issue)
+            .from_select(
+                ["id", "book_id", "user_id", "issue_date", "return_date", "returned"],
+                select(
+                    func.gen_random_uuid(),
+                    book.c.id,
+                    literal(user_id, Issue.user_id.type),
+                    literal(issue_date),
+                    literal(return_date),
+                    literal(False),
+                ),
+            )
+            .returning(*Issue.__table__.c)
+            .cte("new_issues")
+        )
+
+        result = await self.session.execute(select(new_issues).add_cte(reader))
+        issued = {row["book_id"]: dict(row) for row in result.mappings()}
+        for book_id in issued:
+            after_commit(self.session, partial(books_cache.pop, str(book_id)))
+
+        for book_id in unique_ids:
+            if book_id in issued:
+                results[book_id].update(ok=True, issue=issued[book_id])
+            elif len(issued) >= capacity:
+                results[book_id]["error"] = (
+                    f"User has already issued {MAX_ISSUED_BOOKS} books"
+                )
+            else:
+                results[book_id]["error"] = "Book is not available"
+        return list(results.values())
+
+    async def return_many(self, issue_ids: List[uuid.UUID]) -> List[dict]:
+        """Вернуть несколько книг одним запросом, результат по каждой выдаче"""
+        results, unique_ids = _dedupe(issue_ids)
+        returned = {row["id"]: row for row in await self._return_issues(unique_ids)}
+
+        missing = [issue_id for issue_id in unique_ids if issue_id not in returned]
+        existing = set()
+        if missing:
+            result = await self.session.execute(
+                select(Issue.id).where(Issue.id.in_(missing))
+            )
+            existing = set(result.scalars().all())
+
+        for issue_id in unique_ids:
+            if issue_id in returned:
+                results[issue_id].update(ok=True, issue=returned[issue_id])
+            elif issue_id in existing:
+                results[issue_id]["error"] = "Book is already returned"
+            else:
+                results[issue_id]["error"] = "Issue not found"
+        return list(results.values())
+
+    async def _return_issues(self, issue_ids: List[uuid.UUID]) -> List[dict]:
+        """
+        Возврат набора выдач одним запросом.
+
+        Выдачи помечаются возвращенными только если еще не были возвращены,
+        счетчики книг и читателей меняются на число реально возвращенных.
+        """
+        returned = (
+            update(Issue)
+            .where(Issue.id.in_(issue_ids), Issue.returned.is_not(True))
+            .values(returned=True)
+            .returning(*Issue.__table__.c)
+            .cte("returned_issues")
+        )
+        per_book = (
+            select(returned.c.book_id, func.count().label("amount"))
+            .group_by(returned.c.book_id)
+            .cte("per_book")
+        )
+        per_user = (
+            select(returned.c.user_id, func.count().label("amount"))
+            .group_by(returned.c.user_id)
+            .cte("per_user")
+        )
+        book = (
+            update(Books)
+            .where(Books.id == per_book.c.book_id)
+            .values(counter=Books.counter + per_book.c.amount)
+            .returning(Books.id)
+            .cte("book")
+        )
+        reader = (
+            update(User)
+            .where(User.id == per_user.c.user_id)
+            .values(
+                books_count=func.greatest(User.books_count - per_user.c.amount, 0)
+            )
+            .returning(User.id)
+            .cte("reader")
+        )
+
+        query = select(*returned.c).add_cte(book, reader)
+        result = await self.session.execute(query)
+        rows = [dict(row) for row in result.mappings()]
+        for row in rows:
+            after_commit(self.session, partial(books_cache.pop, str(row["book_id"])))
+        return rows
+
+    async def _issue_failure_reason(
+        self, book_id: uuid.UUID, user_id: uuid.UUID
+    ) -> str:
+        """Причина отказа в выдаче (только на пути ошибки)"""
+        query = select(
+            select(User.books_count).where(User.id == user_id).scalar_subquery(),
+            select(Books.counter).where(Books.id == book_id).scalar_subquery(),
+        )
+        books_count, counter = (await self.session.execute(query)).one()
+        if books_count is None:
+            return "User not found"
+        if books_count >= MAX_ISSUED_BOOKS:
+            return f"User has already issued {MAX_ISSUED_BOOKS} books"
+        return "Book is not available"
+
+    async def _return_failure_reason(self, issue_id: uuid.UUID) -> str:
+        """Причина отказа в возврате (только на пути ошибки)"""
+        query = select(Issue.id).where(Issue.id == issue_id)
+        if (await self.session.execute(query)).scalar_one_or_none() is None:
+            return "Issue not found"
+        return "Book is already returned"
+
+
+def _dedupe(ids: List[uuid.UUID]) -> Tuple[dict, List[uuid.UUID]]:
+    """Заготовки результатов в порядке запроса и уникальные id"""
+    results = {}
+    for item_id in ids:
+        results.setdefault(item_id, {"id": item_id, "ok": False, "error": None})
+    return results, list(results)
+
+
+def _fail_all(results: dict, ids: List[uuid.UUID], error: str) -> List[dict]:
+    for item_id in ids:
+        results[item_id]["error"] = error
+    return list(results.values())
@@ -0,0 +1,37 @@
+from pydantic import BaseModel, Field
+from uuid import UUID
+from datetime import date
+from typing import Optional, List
+
+
+class IssueBatchRequest(BaseModel):
+    user_id: UUID
+    book_ids: List[UUID] = Field(min_length=1, max_length=50)
+    days: int = 14
+
+
+class ReturnBatchRequest(BaseModel):
+    issue_ids: List[UUID] = Field(min_length=1, max_length=50)
+
+
+class IssueResponse(BaseModel):
+    id: UUID
+    book_id: UUID
+    user_id: UUID
+    issue_date: Optional[date] = None
+    return_date: Optional[date] = None
+    returned: Optional[bool] = None
+
+    class Config:
+        from_attributes = True
+
+
+class BatchItemResult(BaseModel):
+    id: UUID
+    ok: bool
+    issue: Optional[IssueResponse] = None
+    error: Optional[str] = None
+
+
+class BatchResponse(BaseModel):
+    results: List[BatchItemResult]
@@ -7,12 +7,10 @@ from API_for_library.db.session import get_session
 from .dto import TokenResponseDTO, TokenRequestDTO
 from API_for_library.db.repository import DatabaseRepository
 from API_for_library.models.user import User
-from .generate_password import check_password
-from .generate_token import JWTService
+from .generate_password import password_hasher
+from .generate_token import jwt_service
 
 
-jwt_service = JWTService()
-
 http_bearer_scheme = HTTPBearer()
 
 auth_router = APIRouter(prefix="/auth", tags=["auth"])
@@ -46,7 +44,7 @@ async def get_token_route(
     user = users[0]
 
     try:
-        if not check_password(request.password, user.password_hash):
+        if not await password_hasher.check(request.password, user.password_hash):
             raise HTTPException(
                 status.HTTP_403_FORBIDDEN,
                 {"error_message": "Forbidden. Invalid credentials.", "error_code": 2},
@@ -1,5 +1,18 @@
+import asyncio
+import os
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Optional
+
 import bcrypt
 
+from API_for_library.metrics import (
+    PASSWORD_HASH_DURATION,
+    PASSWORD_HASH_IN_FLIGHT,
+    PASSWORD_HASH_QUEUED,
+)
+from main import PASSWORD_HASHER_MODE, PASSWORD_HASHER_WORKERS
+
 
 def hash_password(password: str) -> bytes:
     """Шифрование пароля"""
@@ -10,3 +23,87 @@ def hash_password(password: str) -> bytes:
 def check_password(password: str, hashed_password: bytes) -> bool:
     """Проверка совпадения пароля"""
     return bcrypt.checkpw(password.encode(), hashed_password)
+
+
+class PasswordHasher:
+    """
+    Выполняет bcrypt вне event loop.
+
+    Пул потоков (bcrypt отпускает GIL) или процессов, число одновременных
+    задач ограничено, остальные ждут в очереди.
+    """
+
+    def __init__(self, mode: str = "thread", workers: Optional[int] = None) -> None:
+        if mode not in ("thread", "process"):
+            raise ValueError(f"Неизвестный режим пула: {mode}")
+        self.mode = mode
+        self.workers = workers or os.cpu_count() or 1
+        self._executor: Optional[Executor] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._in_flight = 0
+        self._queued = 0
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            if self.mode == "process":
+                self._executor = ProcessPoolExecutor(max_workers=self.workers)
+            else:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.workers, thread_name_prefix="bcrypt"
+                )
+        return self._executor
+
+    async def _run(self, func, *args):
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.workers)
+        self._queued += 1
+        PASSWORD_HASH_QUEUED.inc()
+        try:
+            await self._semaphore.acquire()
+        finally:
+            self._queued -= 1
+            PASSWORD_HASH_QUEUED.dec()
+        self._in_flight += 1
+        PASSWORD_HASH_IN_FLIGHT.inc()
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._get_executor(), func, *args)
+        finally:
+            self._in_flight -= 1
+            PASSWORD_HASH_IN_FLIGHT.dec()
+            self._semaphore.release()
+
+    async def hash(self, password: str) -> bytes:
+        """Шифрование пароля в пуле"""
+        started = time.perf_counter()
+        try:
+            return await self._run(hash_password, password)
+        finally:
+            PASSWORD_HASH_DURATION.labels("hash").observe(time.perf_counter() - started)
+
+    async def check(self, password: str, hashed_password: bytes) -> bool:
+        """Проверка пароля в пуле"""
+        started = time.perf_counter()
+        try:
+            return await self._run(check_password, password, hashed_password)
+        finally:
+            PASSWORD_HASH_DURATION.labels("check").observe(
+                time.perf_counter() - started
+            )
+
+    def stats(self) -> dict:
+        """Текущая загрузка пула"""
+        return {
+            "mode": self.mode,
+            "max_concurrency": self.workers,
+            "in_flight": self._in_flight,
+            "queued": self._queued,
+        }
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+
+password_hasher = PasswordHasher(PASSWORD_HASHER_MODE, PASSWORD_HASHER_WORKERS)
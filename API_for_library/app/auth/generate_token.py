@@ -1,11 +1,20 @@
+import hashlib
+import time
 from pathlib import Path
 
 import jwt
+from cryptography.hazmat.primitives.serialization import (
+    load_pem_private_key,
+    load_pem_public_key,
+)
 from pydantic import BaseModel
 from pydantic_settings import BaseSettings
 
 from datetime import datetime, timedelta
 
+from API_for_library.cache import TTLCache
+from API_for_library.metrics import JWT_VERIFY_DURATION
+
 BASE_DIR = Path(__file__).parent.parent
 
 
@@ -14,6 +23,7 @@ class AuthJWT(BaseModel):
     public_key_path: Path = BASE_DIR / "certifications" / "jwt-public.key"
     algorithm: str = "RS256"
     access_token_exipre_minutes: int = 3
+    verified_token_cache_size: int = 10000
 
 
 class Settings(BaseSettings):
@@ -30,11 +40,36 @@ class JWTService:
         public_key_path: Path = settings.auth_jwt.public_key_path,
         algorithm: str = settings.auth_jwt.algorithm,
         access_token_expire_minutes: int = settings.auth_jwt.access_token_exipre_minutes,
+        verified_token_cache_size: int = settings.auth_jwt.verified_token_cache_size,
     ):
-        self.private_key = private_key_path.read_text()
-        self.public_key = public_key_path.read_text()
+        self.private_key_path = private_key_path
+        self.public_key_path = public_key_path
+        self._private_key = None
+        self._public_key = None
         self.algorithm = algorithm
         self.access_token_expire_minutes = access_token_expire_minutes
+        self.verified_tokens: TTLCache[dict] = TTLCache(
+            maxsize=verified_token_cache_size, ttl=0
+        )
+
+    def load_keys(self) -> None:
+        """Чтение и разбор ключей (в lifespan или при первом токене)"""
+        self._private_key = load_pem_private_key(
+            self.private_key_path.read_bytes(), password=None
+        )
+        self._public_key = load_pem_public_key(self.public_key_path.read_bytes())
+
+    @property
+    def private_key(self):
+        if self._private_key is None:
+            self.load_keys()
+        return self._private_key
+
+    @property
+    def public_key(self):
+        if self._public_key is None:
+            self.load_keys()
+        return self._public_key
 
     def encode_jwt(self, payload: dict) -> str:
         """
@@ -50,11 +85,32 @@ class JWTService:
     def decode_jwt(self, token: str) -> dict:
         """
         Декодируем JWT токен.
+
+        Проверенные токены кэшируются по хэшу до своего exp, повторный
+        запрос с тем же токеном не проверяет подпись RS256 заново.
         """
+        started = time.perf_counter()
+        result = "invalid"
         try:
+            digest = hashlib.sha256(token.encode()).digest()
+            cached = self.verified_tokens.get(digest)
+            if cached is not None:
+                result = "cached"
+                return dict(cached)
             decoded = jwt.decode(token, self.public_key, algorithms=[self.algorithm])
-            return decoded
+            if "exp" in decoded:
+                self.verified_tokens.set(
+                    digest, decoded, ttl=decoded["exp"] - time.time()
+                )
+            result = "verified"
+            return dict(decoded)
         except jwt.ExpiredSignatureError:
+            result = "expired"
             raise ValueError("Токен истек")
         except jwt.InvalidTokenError:
             raise ValueError("Недействительный токен")
+        finally:
+            JWT_VERIFY_DURATION.labels(result).observe(time.perf_counter() - started)
+
+
+jwt_service = JWTService()
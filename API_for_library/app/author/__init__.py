@@ -1,19 +1,18 @@
-import datetime
-
-from fastapi import Depends, APIRouter, HTTPException, status
-from sqlalchemy import select
+from fastapi import Depends, APIRouter, HTTPException, Request, Response, status
 from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Optional
 from uuid import UUID
 
-from sqlalchemy.orm import joinedload
-
-from API_for_library.db.session import get_session
+from API_for_library.db.session import after_commit, get_session
 from API_for_library.db.repository import DatabaseRepository
 from API_for_library.models.authors import Authors
 from .dto import AuthorCreate, AuthorResponse, AuthorUpdate
 from ..user import check_admin, get_current_user
+from ..responses import dto_response, parse_fields, projection_response
 from API_for_library.models.user import User
-from API_for_library.models.logs import Logs
+from API_for_library.audit import audit_log
+from API_for_library.cache import make_etag, etag_matches
+from API_for_library.cache.catalog import authors_cache, books_cache
 
 author_router = APIRouter(prefix="/author", tags=["author"])
 
@@ -21,13 +20,7 @@ author_router = APIRouter(prefix="/author", tags=["author"])
 def get_authors_repository(
     session: AsyncSession = Depends(get_session),
 ) -> DatabaseRepository[Authors]:
-    return DatabaseRepository(Authors, session)
-
-
-def get_log_repository(
-    session: AsyncSession = Depends(get_session),
-) -> DatabaseRepository[Logs]:
-    return DatabaseRepository(model=Logs, session=session)
+    return DatabaseRepository(Authors, session, cache=authors_cache)
 
 
 async def check_user(current_user: User = Depends(get_current_user)):
@@ -47,29 +40,18 @@ async def check_user(current_user: User = Depends(get_current_user)):
 async def create_author(
     data: AuthorCreate,
     repository: DatabaseRepository[Authors] = Depends(get_authors_repository),
-    logs_repo: DatabaseRepository[Logs] = Depends(get_log_repository),
     user: User = Depends(check_admin),
 ):
     """Создать нового автора"""
     new_author = await repository.create(data.dict())
 
-    async with get_session() as session:
-        result = await session.execute(
-            select(Authors)
-            .options(joinedload(Authors.books))
-            .filter(Authors.id == new_author.id)
-        )
-        author_with_books = result.scalars().first()
-
-    await logs_repo.create(
-        {
-            "event_type": "CREATE",
-            "description": f"User {user.id} added new author {new_author.name} who have id {new_author.id}",
-            "timestamp": datetime.datetime.now(),
-        }
+    audit_log.log_after_commit(
+        repository.session,
+        "CREATE",
+        f"User {user.id} added new author {new_author.name} who have id {new_author.id}",
     )
 
-    return author_with_books
+    return dto_response(AuthorResponse, new_author)
 
 
 @author_router.get(
@@ -77,23 +59,45 @@ async def create_author(
     response_model=AuthorResponse,
     responses={
         status.HTTP_200_OK: {"description": "Author retrieved successfully."},
+        status.HTTP_304_NOT_MODIFIED: {"description": "Author not modified."},
         status.HTTP_404_NOT_FOUND: {"description": "Author not found."},
         status.HTTP_400_BAD_REQUEST: {"description": "Invalid author ID."},
     },
 )
 async def get_author(
     author_id: UUID,
+    request: Request,
+    fields: Optional[str] = None,
     repository: DatabaseRepository[Authors] = Depends(get_authors_repository),
     user: User = Depends(check_user),
 ):
     """Получить автора по ID"""
+    columns = parse_fields(fields, AuthorResponse)
     try:
-        author = await repository.get(author_id)
+        if columns:
+            rows = await repository.project(
+                [*columns, "updated_at"], Authors.id == author_id
+            )
+            author = rows[0] if rows else None
+        else:
+            author = await repository.get(author_id)
         if not author:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND, detail="Author not found."
             )
-        return author
+        if columns:
+            updated_at = author.pop("updated_at")
+        else:
+            updated_at = author.updated_at
+        etag = make_etag(author_id, updated_at.isoformat(), *(columns or []))
+        if etag_matches(request.headers.get("if-none-match"), etag):
+            return Response(
+                status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag}
+            )
+        headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+        if columns:
+            return projection_response(author, headers=headers)
+        return dto_response(AuthorResponse, author, headers=headers)
     except ValueError:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -116,7 +120,6 @@ async def update_author(
     author_id: UUID,
     data: AuthorUpdate,
     repository: DatabaseRepository[Authors] = Depends(get_authors_repository),
-    logs_repo: DatabaseRepository[Logs] = Depends(get_log_repository),
     user: User = Depends(check_admin),
 ):
     """Обновить информацию об авторе"""
@@ -126,14 +129,14 @@ async def update_author(
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND, detail="Author not found."
             )
-        await logs_repo.create(
-            {
-                "event_type": "UPDATE",
-                "description": f"User {user.id} update info for author {updated_author.name} who have id {updated_author.id}",
-                "timestamp": datetime.datetime.now(),
-            }
+        audit_log.log_after_commit(
+            repository.session,
+            "UPDATE",
+            f"User {user.id} update info for author {updated_author.name} who have id {updated_author.id}",
         )
-        return updated_author
+        return dto_response(AuthorResponse, updated_author)
+    except HTTPException:
+        raise
     except ValueError:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -157,23 +160,26 @@ async def update_author(
 async def delete_author(
     author_id: UUID,
     repository: DatabaseRepository[Authors] = Depends(get_authors_repository),
-    logs_repo: DatabaseRepository[Logs] = Depends(get_log_repository),
     user: User = Depends(check_admin),
 ):
     """Удалить автора"""
     try:
-        await repository.delete(author_id)
-        await logs_repo.create(
-            {
-                "event_type": "DELETE",
-                "description": f"User {user.id} delete author {author_id}",
-                "timestamp": datetime.datetime.now(),
-            }
+        if not await repository.delete(author_id):
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND, detail="Author not found."
+            )
+        after_commit(repository.session, books_cache.clear)
+        audit_log.log_after_commit(
+            repository.session,
+            "DELETE",
+            f"User {user.id} delete author {author_id}",
         )
         return {
             "content": {"message": "Author deleted successfully"},
             "status_code": status.HTTP_200_OK,
         }
+    except HTTPException:
+        raise
     except ValueError:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -1,9 +1,13 @@
-import datetime
-from fastapi import Depends, APIRouter, HTTPException, status
+from typing import Optional
+
+from fastapi import Depends, APIRouter, HTTPException, Query, Request, Response, status
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 from uuid import UUID
-from .dto import BookResponse, BookCreate, BookUpdate
+from .dto import BookResponse, BookCreate, BookUpdate, BookPage, BookSearchPage
+from .search import search_books
+from .importer import BookImporter, iter_csv, iter_ndjson
+from ..responses import dto_response, parse_fields, projection_response
 
 from API_for_library.db.session import get_session
 from API_for_library.db.repository import DatabaseRepository
@@ -11,7 +15,10 @@ from API_for_library.models.books import Books
 from ..user import check_admin
 from ..author import check_user
 from API_for_library.models.user import User
-from API_for_library.models.logs import Logs
+from API_for_library.audit import audit_log
+from API_for_library.cache import make_etag, etag_matches
+from API_for_library.cache.catalog import books_cache
+from main import IMPORT_CHUNK_SIZE
 
 books_router = APIRouter(prefix="/books", tags=["books"])
 
@@ -19,13 +26,7 @@ books_router = APIRouter(prefix="/books", tags=["books"])
 def get_books_repository(
     session: AsyncSession = Depends(get_session),
 ) -> DatabaseRepository[Books]:
-    return DatabaseRepository(model=Books, session=session)
-
-
-def get_log_repository(
-    session: AsyncSession = Depends(get_session),
-) -> DatabaseRepository[Logs]:
-    return DatabaseRepository(model=Logs, session=session)
+    return DatabaseRepository(model=Books, session=session, cache=books_cache)
 
 
 @books_router.post(
@@ -41,20 +42,17 @@ def get_log_repository(
 async def create_book(
     book: BookCreate,
     repository: DatabaseRepository[Books] = Depends(get_books_repository),
-    logs_repo: DatabaseRepository[Logs] = Depends(get_log_repository),
     user: User = Depends(check_admin),
 ):
     """Создать новую книгу"""
     try:
         book = await repository.create(book.dict())
-        await logs_repo.create(
-            {
-                "event_type": "CREATE",
-                "description": f"User {user.id} added new book {book.title} which have id {book.id}",
-                "timestamp": datetime.datetime.now(),
-            }
+        audit_log.log_after_commit(
+            repository.session,
+            "CREATE",
+            f"User {user.id} added new book {book.title} which have id {book.id}",
         )
-        return book
+        return dto_response(BookResponse, book)
     except IntegrityError as e:
         if "foreign key constraint" in str(e.orig):
             raise HTTPException(
@@ -71,28 +69,127 @@ async def create_book(
         )
 
 
+@books_router.post(
+    "/import",
+    responses={
+        status.HTTP_200_OK: {"description": "Import finished, see per-row errors."},
+        status.HTTP_415_UNSUPPORTED_MEDIA_TYPE: {
+            "description": "Body must be text/csv or application/x-ndjson."
+        },
+    },
+)
+async def import_books(
+    request: Request,
+    repository: DatabaseRepository[Books] = Depends(get_books_repository),
+    user: User = Depends(check_admin),
+):
+    """
+    Массовый импорт книг из потока CSV (с заголовком) или NDJSON.
+
+    Строки с ошибками валидации или несуществующим author_id пропускаются
+    и возвращаются в отчете, остальные загружаются.
+    """
+    content_type = request.headers.get("content-type", "").split(";")[0].strip()
+    if content_type == "text/csv":
+        records = iter_csv(request.stream())
+    elif content_type in ("application/x-ndjson", "application/jsonl"):
+        records = iter_ndjson(request.stream())
+    else:
+        raise HTTPException(
+            status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            detail="Body must be text/csv or application/x-ndjson.",
+        )
+
+    try:
+        report = await BookImporter(repository, IMPORT_CHUNK_SIZE).run(records)
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Error importing books: {str(e)}",
+        )
+    audit_log.log_after_commit(
+        repository.session,
+        "IMPORT",
+        f"User {user.id} imported {report['imported']} books, {report['failed']} failed",
+    )
+    return report
+
+
+@books_router.get(
+    "/search",
+    response_model=BookSearchPage,
+    responses={
+        status.HTTP_200_OK: {"description": "Search results retrieved successfully."},
+        status.HTTP_400_BAD_REQUEST: {"description": "Error searching books."},
+    },
+)
+async def search_books_route(
+    q: str = Query(..., min_length=1, max_length=256),
+    limit: int = Query(20, ge=1, le=100),
+    offset: int = Query(0, ge=0),
+    fields: Optional[str] = None,
+    session: AsyncSession = Depends(get_session),
+    user: User = Depends(check_user),
+):
+    """Полнотекстовый поиск книг"""
+    columns = parse_fields(fields, BookResponse)
+    try:
+        items, has_more = await search_books(session, q, limit, offset, columns)
+        page = {"items": items, "next_offset": offset + limit if has_more else None}
+        if columns:
+            return projection_response(page)
+        return dto_response(BookSearchPage, page)
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Error searching books: {str(e)}",
+        )
+
+
 @books_router.get(
     "/{book_id}",
     response_model=BookResponse,
     responses={
         status.HTTP_200_OK: {"description": "Book retrieved successfully."},
+        status.HTTP_304_NOT_MODIFIED: {"description": "Book not modified."},
         status.HTTP_404_NOT_FOUND: {"description": "Book not found."},
         status.HTTP_400_BAD_REQUEST: {"description": "Invalid book ID."},
     },
 )
 async def get_book(
     book_id: UUID,
+    request: Request,
+    fields: Optional[str] = None,
     repository: DatabaseRepository[Books] = Depends(get_books_repository),
     user: User = Depends(check_user),
 ):
     """Получить книгу по ID"""
+    columns = parse_fields(fields, BookResponse)
     try:
-        book = await repository.get(book_id)
+        if columns:
+            rows = await repository.project(
+                [*columns, "updated_at"], Books.id == book_id
+            )
+            book = rows[0] if rows else None
+        else:
+            book = await repository.get(book_id)
         if not book:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND, detail="Book not found."
             )
-        return book
+        if columns:
+            updated_at = book.pop("updated_at")
+        else:
+            updated_at = book.updated_at
+        etag = make_etag(book_id, updated_at.isoformat(), *(columns or []))
+        if etag_matches(request.headers.get("if-none-match"), etag):
+            return Response(
+                status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag}
+            )
+        headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+        if columns:
+            return projection_response(book, headers=headers)
+        return dto_response(BookResponse, book, headers=headers)
     except ValueError:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -113,7 +210,6 @@ async def update_book(
     book_id: UUID,
     data: BookUpdate,
     repository: DatabaseRepository[Books] = Depends(get_books_repository),
-    logs_repo: DatabaseRepository[Logs] = Depends(get_log_repository),
     user: User = Depends(check_admin),
 ):
     """Обновить информацию о книге"""
@@ -123,14 +219,14 @@ async def update_book(
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND, detail="Book not found."
             )
-        await logs_repo.create(
-            {
-                "event_type": "UPDATE",
-                "description": f"User {user.id} update book {updated_book.title} which have id {updated_book.id}",
-                "timestamp": datetime.datetime.now(),
-            }
+        audit_log.log_after_commit(
+            repository.session,
+            "UPDATE",
+            f"User {user.id} update book {updated_book.title} which have id {updated_book.id}",
         )
-        return updated_book
+        return dto_response(BookResponse, updated_book)
+    except HTTPException:
+        raise
     except ValueError:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -154,20 +250,22 @@ async def update_book(
 async def delete_book(
     book_id: UUID,
     repository: DatabaseRepository[Books] = Depends(get_books_repository),
-    logs_repo: DatabaseRepository[Logs] = Depends(get_log_repository),
     user: User = Depends(check_admin),
 ):
     """Удалить книгу"""
     try:
-        await repository.delete(book_id)
-        await logs_repo.create(
-            {
-                "event_type": "CREATE",
-                "description": f"User {user.id} delete book {book_id}",
-                "timestamp": datetime.datetime.now(),
-            }
+        if not await repository.delete(book_id):
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND, detail="Book not found."
+            )
+        audit_log.log_after_commit(
+            repository.session,
+            "CREATE",
+            f"User {user.id} delete book {book_id}",
         )
         return {"message": "Book deleted successfully"}
+    except HTTPException:
+        raise
     except ValueError:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -182,18 +280,33 @@ async def delete_book(
 
 @books_router.get(
     "/",
+    response_model=BookPage,
     responses={
         status.HTTP_200_OK: {"description": "Books retrieved successfully."},
         status.HTTP_400_BAD_REQUEST: {"description": "Error retrieving books."},
     },
 )
 async def list_books(
+    limit: int = Query(50, ge=1, le=500),
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None,
     repository: DatabaseRepository[Books] = Depends(get_books_repository),
     user: User = Depends(check_user),
 ):
-    """Получить список всех книг"""
+    """
+    Получить страницу списка книг.
+
+    fields=id,title выбирает из базы только эти колонки и отдает только их.
+    """
+    columns = parse_fields(fields, BookResponse)
     try:
-        return await repository.all()
+        items, next_cursor = await repository.paginate(
+            limit=limit, cursor=cursor, columns=columns
+        )
+        page = {"items": items, "next_cursor": next_cursor}
+        if columns:
+            return projection_response(page)
+        return dto_response(BookPage, page)
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
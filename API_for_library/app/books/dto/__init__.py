@@ -1,7 +1,7 @@
 from pydantic import BaseModel
 from uuid import UUID
 from datetime import date
-from typing import Optional
+from typing import Optional, List
 
 
 class BookCreate(BaseModel):
@@ -42,3 +42,13 @@ class BookResponse(BaseModel):
 
     class Config:
         from_attributes = True
+
+
+class BookPage(BaseModel):
+    items: List[BookResponse]
+    next_cursor: Optional[str] = None
+
+
+class BookSearchPage(BaseModel):
+    items: List[BookResponse]
+    next_offset: Optional[int] = None
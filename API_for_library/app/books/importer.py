@@ -0,0 +1,168 @@
+import csv
+import json
+from typing import AsyncIterator, List, Optional, Tuple, Union
+
+from pydantic import ValidationError
+from sqlalchemy import select
+
+from API_for_library.db.repository import DatabaseRepository
+from API_for_library.models.authors import Authors
+from API_for_library.models.books import Books
+from .dto import BookCreate
+
+MAX_REPORTED_ERRORS = 1000
+
+Record = Tuple[int, Union[dict, ValueError]]
+
+
+def decode_line(line: bytes) -> Union[str, ValueError]:
+    try:
+        return line.rstrip(b"\r").decode()
+    except UnicodeDecodeError as e:
+        return ValueError(f"Invalid UTF-8: {e}")
+
+
+async def iter_lines(
+    chunks: AsyncIterator[bytes],
+) -> AsyncIterator[Union[str, ValueError]]:
+    """
+    Строки из потока байт тела запроса.
+
+    Строка, которая не декодируется как UTF-8, отдается как ValueError,
+    чтобы ошибка попала в отчет по этой строке, а не валила весь импорт.
+    """
+    tail = b""
+    async for chunk in chunks:
+        tail += chunk
+        *lines, tail = tail.split(b"\n")
+        for line in lines:
+            yield decode_line(line)
+    if tail:
+        yield decode_line(tail)
+
+
+async def iter_ndjson(chunks: AsyncIterator[bytes]) -> AsyncIterator[Record]:
+    """Записи NDJSON с номерами строк"""
+    row = 0
+    async for line in iter_lines(chunks):
+        row += 1
+        if isinstance(line, ValueError):
+            yield row, line
+            continue
+        if not line.strip():
+            continue
+        try:
+            yield row, json.loads(line)
+        except ValueError as e:
+            yield row, e
+
+
+async def iter_csv(chunks: AsyncIterator[bytes]) -> AsyncIterator[Record]:
+    """
+    Записи CSV с номерами записей, первая строка - заголовок.
+
+    Запись с переводом строки внутри кавычек собирается из нескольких строк:
+    запись закончена, когда число кавычек в ней четное.
+    """
+    header: Optional[List[str]] = None
+    record = ""
+    row = 0
+    async for line in iter_lines(chunks):
+        if isinstance(line, ValueError):
+            if header is None:
+                raise ValueError(f"CSV header: {line}")
+            # Недекодируемая строка портит всю запись, в которую попала
+            record = ""
+            row += 1
+            yield row, line
+            continue
+        record = f"{record}\n{line}" if record else line
+        if record.count('"') % 2:
+            continue
+        if not record.strip():
+            record = ""
+            continue
+        values = next(csv.reader([record]))
+        record = ""
+        if header is None:
+            header = values
+            continue
+        row += 1
+        if len(values) != len(header):
+            yield row, ValueError(f"Expected {len(header)} columns, got {len(values)}")
+            continue
+        yield row, {key: value or None for key, value in zip(header, values)}
+    if record:
+        yield row + 1, ValueError("Unterminated quoted field")
+
+
+class BookImporter:
+    """
+    Импорт каталога пачками.
+
+    Каждая пачка валидируется через BookCreate, author_id проверяются одним
+    запросом на пачку, валидные строки пишутся через COPY в точке сохранения.
+    Ошибочные строки (и пачка, которую отвергла база) попадают в отчет и не
+    валят весь импорт.
+    """
+
+    def __init__(self, repository: DatabaseRepository[Books], chunk_size: int) -> None:
+        self.repository = repository
+        self.chunk_size = chunk_size
+        self.imported = 0
+        self.failed = 0
+        self.errors: List[dict] = []
+
+    async def run(self, records: AsyncIterator[Record]) -> dict:
+        chunk: List[Tuple[int, BookCreate]] = []
+        async for row, data in records:
+            if isinstance(data, ValueError):
+                self._error(row, str(data))
+                continue
+            try:
+                chunk.append((row, BookCreate.model_validate(data)))
+            except ValidationError as e:
+                self._error(row, str(e))
+            if len(chunk) >= self.chunk_size:
+                await self._write(chunk)
+                chunk = []
+        await self._write(chunk)
+        return {
+            "imported": self.imported,
+            "failed": self.failed,
+            "errors": self.errors,
+        }
+
+    async def _write(self, chunk: List[Tuple[int, BookCreate]]) -> None:
+        if not chunk:
+            return
+        author_ids = {book.author_id for _, book in chunk}
+        result = await self.repository.session.execute(
+            select(Authors.id).where(Authors.id.in_(author_ids))
+        )
+        known_authors = set(result.scalars().all())
+
+        rows, numbers = [], []
+        for row, book in chunk:
+            if book.author_id not in known_authors:
+                self._error(row, f"Author {book.author_id} does not exist")
+                continue
+            rows.append(book.model_dump())
+            numbers.append(row)
+        if not rows:
+            return
+        # Каждая пачка в своей точке сохранения: ошибка базы откатывает
+        # только эту пачку, а не все, что уже загружено в транзакции запроса
+        try:
+            async with self.repository.session.begin_nested():
+                copied = await self.repository.copy(rows)
+        except Exception as e:
+            for row in numbers:
+                self._error(row, f"Chunk was not written: {e}")
+            return
+        self.imported += copied
+
+    def _error(self, row: Optional[int], error: str) -> None:
+        self.failed += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({"row": row, "error": error})
@@ -0,0 +1,42 @@
+from typing import List, Optional, Sequence, Tuple
+
+from sqlalchemy import func, literal_column, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from API_for_library.db.session import ON_REPLICA
+from API_for_library.models.books import Books, SEARCH_CONFIG
+
+
+async def search_books(
+    session: AsyncSession,
+    q: str,
+    limit: int,
+    offset: int = 0,
+    columns: Optional[Sequence[str]] = None,
+) -> Tuple[List, bool]:
+    """
+    Полнотекстовый поиск по каталогу.
+
+    Запрос разбирается websearch_to_tsquery (кавычки, OR, минус), выдача
+    сортируется по ts_rank_cd с весами title > authors > genre > description.
+    Возвращает страницу и признак, что есть следующая. Если заданы columns,
+    выбираются только они и страница состоит из словарей.
+    """
+    ts_query = func.websearch_to_tsquery(
+        literal_column(f"'{SEARCH_CONFIG}'::regconfig"), q
+    )
+    rank = func.ts_rank_cd(Books.search_vector, ts_query)
+    selected = [getattr(Books, name) for name in columns] if columns else [Books]
+    query = (
+        select(*selected)
+        .where(Books.search_vector.op("@@")(ts_query))
+        .order_by(rank.desc(), Books.id)
+        .offset(offset)
+        .limit(limit + 1)
+    )
+    result = await session.execute(query, bind_arguments=ON_REPLICA)
+    if columns:
+        items = [dict(row) for row in result.mappings()]
+    else:
+        items = result.scalars().all()
+    return items[:limit], len(items) > limit
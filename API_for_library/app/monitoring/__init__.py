@@ -0,0 +1,45 @@
+from fastapi import APIRouter, Depends, Response, status
+
+from API_for_library.db.pool import pool_stats
+from API_for_library.db.session import get_engine, get_replica_engine
+from API_for_library.metrics import CONTENT_TYPE_LATEST, render_metrics
+from API_for_library.models.user import User
+from ..auth.generate_password import password_hasher
+from ..user import check_admin
+
+monitoring_router = APIRouter(prefix="/monitoring", tags=["monitoring"])
+metrics_router = APIRouter(tags=["monitoring"])
+
+
+@monitoring_router.get(
+    "/pool",
+    responses={
+        status.HTTP_200_OK: {"description": "Connection pool statistics."},
+        status.HTTP_403_FORBIDDEN: {"description": "Access denied."},
+    },
+)
+async def get_pool_stats(user: User = Depends(check_admin)):
+    """Состояние пула соединений с базой (только для администраторов)"""
+    stats = pool_stats(get_engine().pool)
+    replica = get_replica_engine()
+    if replica is not None:
+        stats["replica"] = pool_stats(replica.pool)
+    return stats
+
+
+@monitoring_router.get(
+    "/password-hasher",
+    responses={
+        status.HTTP_200_OK: {"description": "Password hasher pool statistics."},
+        status.HTTP_403_FORBIDDEN: {"description": "Access denied."},
+    },
+)
+async def get_password_hasher_stats(user: User = Depends(check_admin)):
+    """Загрузка пула bcrypt в этом процессе (только для администраторов)"""
+    return password_hasher.stats()
+
+
+@metrics_router.get("/metrics", include_in_schema=False)
+async def get_metrics():
+    """Метрики для Prometheus"""
+    return Response(content=render_metrics(), media_type=CONTENT_TYPE_LATEST)
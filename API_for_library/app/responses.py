@@ -0,0 +1,65 @@
+from functools import lru_cache
+from typing import Any, List, Optional, Type
+
+import orjson
+from fastapi import HTTPException, Response, status
+from pydantic import BaseModel, TypeAdapter
+
+
+@lru_cache(maxsize=None)
+def get_adapter(dto: Type[BaseModel], many: bool = False) -> TypeAdapter:
+    """TypeAdapter на DTO (или список DTO), создается один раз на тип"""
+    return TypeAdapter(List[dto] if many else dto)
+
+
+def dto_response(
+    dto: Type[BaseModel],
+    data: Any,
+    status_code: int = status.HTTP_200_OK,
+    headers: Optional[dict] = None,
+) -> Response:
+    """
+    Ответ, сериализованный через DTO сразу в байты.
+
+    ORM-объекты (или их список) валидируются один раз по атрибутам и
+    выгружаются в JSON в pydantic-core, без повторной валидации по
+    response_model и jsonable_encoder в FastAPI.
+    """
+    adapter = get_adapter(dto, isinstance(data, (list, tuple)))
+    value = adapter.validate_python(data, from_attributes=True)
+    return Response(
+        content=adapter.dump_json(value),
+        status_code=status_code,
+        headers=headers,
+        media_type="application/json",
+    )
+
+
+def projection_response(data: Any, headers: Optional[dict] = None) -> Response:
+    """
+    Ответ для fields=: словари со строками Core как есть через orjson.
+
+    asyncpg отдает UUID своим типом, который orjson не принимает, поэтому
+    неизвестные orjson значения приводятся к строке.
+    """
+    return Response(
+        content=orjson.dumps(data, default=str),
+        headers=headers,
+        media_type="application/json",
+    )
+
+
+def parse_fields(fields: Optional[str], dto: Type[BaseModel]) -> Optional[List[str]]:
+    """Разбор параметра fields=a,b,c с проверкой по полям DTO"""
+    if not fields:
+        return None
+    names = list(dict.fromkeys(name.strip() for name in fields.split(",")))
+    names = [name for name in names if name]
+    unknown = [name for name in names if name not in dto.model_fields]
+    if unknown or not names:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unknown fields: {', '.join(unknown)}. "
+            f"Allowed: {', '.join(dto.model_fields)}",
+        )
+    return names
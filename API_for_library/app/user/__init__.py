@@ -1,29 +1,29 @@
-import datetime
 import random
+from functools import partial
 
 from fastapi import APIRouter, HTTPException, status, Depends
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy.ext.asyncio import AsyncSession
-from typing import List
+from typing import List, Optional
 
-from ..auth.generate_token import JWTService
-from ..auth.generate_password import hash_password
+from ..auth.generate_token import jwt_service
+from ..auth.generate_password import password_hasher
 from ..user.dto import UserCreateDTO, UserResponseDTO
+from ..responses import dto_response, parse_fields, projection_response
 from API_for_library.models.user import User
-from API_for_library.models.logs import Logs
+from API_for_library.audit import audit_log
 from API_for_library.db.repository import DatabaseRepository
-from API_for_library.db.session import get_session
+from API_for_library.db.session import after_commit, get_session, use_primary
+from API_for_library.cache import TTLCache
+from main import PRINCIPAL_CACHE_SIZE, PRINCIPAL_CACHE_TTL
 
 user_router = APIRouter(prefix="/user", tags=["user"])
 
-jwt_service = JWTService()
 http_bearer_scheme = HTTPBearer()
 
-
-def get_log_repository(
-    session: AsyncSession = Depends(get_session),
-) -> DatabaseRepository[Logs]:
-    return DatabaseRepository(model=Logs, session=session)
+principal_cache: TTLCache[dict] = TTLCache(
+    maxsize=PRINCIPAL_CACHE_SIZE, ttl=PRINCIPAL_CACHE_TTL
+)
 
 
 fun_verb = [
@@ -64,7 +64,7 @@ async def get_current_user(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Invalid token: missing 'sub'.",
             )
-        user_repo = DatabaseRepository(User, session)
+        user_repo = DatabaseRepository(User, session, cache=principal_cache)
         user = await user_repo.get(user_id)
         if not user:
             raise HTTPException(
@@ -97,21 +97,23 @@ async def check_admin(current_user: User = Depends(get_current_user)):
     },
 )
 async def get_all_users(
+    fields: Optional[str] = None,
     admin_user: User = Depends(check_admin),
     session: AsyncSession = Depends(get_session),
-    logs_repo: DatabaseRepository[Logs] = Depends(get_log_repository),
 ):
     """Возвращает список всех зарегистрированных читателей (только для администраторов)."""
+    columns = parse_fields(fields, UserResponseDTO)
     user_repo = DatabaseRepository(User, session)
-    all_users = await user_repo.filter(User.role != "admin")
-    await logs_repo.create(
-        {
-            "event_type": "GET ALL USER",
-            "description": f"User {admin_user.id} wanna see all users",
-            "timestamp": datetime.datetime.now(),
-        }
+    audit_log.log_after_commit(
+        session,
+        "GET ALL USER",
+        f"User {admin_user.id} wanna see all users",
     )
-    return [UserResponseDTO.from_orm(user) for user in all_users]
+    if columns:
+        users = await user_repo.project(columns, User.role != "admin")
+        return projection_response(users)
+    all_users = await user_repo.filter(User.role != "admin")
+    return dto_response(UserResponseDTO, all_users)
 
 
 @user_router.post(
@@ -128,9 +130,10 @@ async def get_all_users(
 async def create_user_route(
     user_data: UserCreateDTO,
     session: AsyncSession = Depends(get_session),
-    logs_repo: DatabaseRepository[Logs] = Depends(get_log_repository),
 ):
     """Создает юзера по переданным данным"""
+    # Проверка перед записью: отстающая реплика пропустила бы дубликат
+    use_primary(session)
     user_repo = DatabaseRepository(User, session)
     existing_user = await user_repo.filter(User.email == user_data.email)
     if existing_user:
@@ -139,21 +142,19 @@ async def create_user_route(
             detail="User with this email already exists",
         )
 
-    hashed_password = hash_password(user_data.password)
+    hashed_password = await password_hasher.hash(user_data.password)
     user_data_dict = user_data.dict()
     user_data_dict["password_hash"] = hashed_password
     del user_data_dict["password"]
 
     created_user = await user_repo.create(user_data_dict)
     verb = fun_verb[random.randint(0, 19)]
-    await logs_repo.create(
-        {
-            "event_type": "NEW USER",
-            "description": f"User {created_user.id} has been selected to {verb}",
-            "timestamp": datetime.datetime.now(),
-        }
+    audit_log.log_after_commit(
+        session,
+        "NEW USER",
+        f"User {created_user.id} has been selected to {verb}",
     )
-    return UserResponseDTO.from_orm(created_user)
+    return dto_response(UserResponseDTO, created_user)
 
 
 @user_router.patch(
@@ -177,11 +178,12 @@ async def patch_user_data(
     updated_user = await user_repo.update(
         current_user.id, user_data.dict(exclude_unset=True)
     )
+    after_commit(session, partial(principal_cache.pop, str(current_user.id)))
     if not updated_user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="User not found."
         )
-    return UserResponseDTO.from_orm(updated_user)
+    return dto_response(UserResponseDTO, updated_user)
 
 
 @user_router.put(
@@ -200,11 +202,12 @@ async def update_user_data(
     """Редактирует данные юзера."""
     user_repo = DatabaseRepository(User, session)
     updated_user = await user_repo.update(current_user.id, user_data.dict())
+    after_commit(session, partial(principal_cache.pop, str(current_user.id)))
     if not updated_user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="User not found."
         )
-    return UserResponseDTO.from_orm(updated_user)
+    return dto_response(UserResponseDTO, updated_user)
 
 
 @user_router.delete(
@@ -220,7 +223,12 @@ async def delete_user(
 ):
     """Удаляет юзера."""
     user_repo = DatabaseRepository(User, session)
-    await user_repo.delete(current_user.id)
+    deleted = await user_repo.delete(current_user.id)
+    after_commit(session, partial(principal_cache.pop, str(current_user.id)))
+    if not deleted:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="User not found"
+        )
     return {"message": "User deleted successfully."}
 
 
@@ -237,4 +245,4 @@ async def delete_user(
 )
 async def get_user_route(current_user: User = Depends(get_current_user)):
     """Выдает данные юзера по jwt токену."""
-    return UserResponseDTO.from_orm(current_user)
+    return dto_response(UserResponseDTO, current_user)
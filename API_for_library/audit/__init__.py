@@ -0,0 +1,106 @@
+import asyncio
+import datetime
+import logging
+from functools import partial
+from typing import List, Optional
+
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from API_for_library.db.session import after_commit, async_session_maker
+from API_for_library.models.logs import Logs
+from main import AUDIT_BATCH_SIZE, AUDIT_FLUSH_INTERVAL, AUDIT_QUEUE_SIZE
+
+logger = logging.getLogger(__name__)
+
+_STOP = object()
+
+
+class AuditLogWriter:
+    """
+    Фоновая запись событий в таблицу logs.
+
+    Обработчики кладут событие в очередь и не ждут базу; фоновая задача
+    пишет пачками одним INSERT по размеру пачки или по таймеру. Если очередь
+    заполнена, log() ждет свободного места. При остановке очередь дописывается.
+    """
+
+    def __init__(
+        self,
+        batch_size: int = AUDIT_BATCH_SIZE,
+        flush_interval: float = AUDIT_FLUSH_INTERVAL,
+        queue_size: int = AUDIT_QUEUE_SIZE,
+    ) -> None:
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self._task: Optional[asyncio.Task] = None
+
+    async def log(self, event_type: str, description: str) -> None:
+        """Поставить событие в очередь на запись"""
+        event = {
+            "event_type": event_type,
+            "description": description,
+            "timestamp": datetime.datetime.now(),
+        }
+        if self._task is None:
+            await self._flush([event])
+            return
+        await self._queue.put(event)
+
+    def log_after_commit(
+        self, session: AsyncSession, event_type: str, description: str
+    ) -> None:
+        """
+        Поставить событие в очередь после коммита транзакции запроса.
+
+        Так в журнал не попадают действия, которые потом откатились, и
+        запись аудита не опережает сами данные.
+        """
+        after_commit(session, partial(self.log, event_type, description))
+
+    async def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Дописать все, что осталось в очереди, и остановить задачу"""
+        if self._task is None:
+            return
+        await self._queue.put(_STOP)
+        await self._task
+        self._task = None
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        stopping = False
+        while not stopping:
+            item = await self._queue.get()
+            if item is _STOP:
+                break
+            batch = [item]
+            deadline = loop.time() + self.flush_interval
+            while len(batch) < self.batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(self._queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                if item is _STOP:
+                    stopping = True
+                    break
+                batch.append(item)
+            await self._flush(batch)
+
+    async def _flush(self, batch: List[dict]) -> None:
+        try:
+            async with async_session_maker() as session:
+                await session.execute(insert(Logs), batch)
+                await session.commit()
+        except Exception:
+            logger.exception("Не удалось записать %d событий аудита", len(batch))
+
+
+audit_log = AuditLogWriter()
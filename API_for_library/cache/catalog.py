@@ -0,0 +1,9 @@
+from API_for_library.cache import TTLCache
+from main import CATALOG_CACHE_SIZE, CATALOG_CACHE_TTL
+
+books_cache: TTLCache[dict] = TTLCache(
+    maxsize=CATALOG_CACHE_SIZE, ttl=CATALOG_CACHE_TTL
+)
+authors_cache: TTLCache[dict] = TTLCache(
+    maxsize=CATALOG_CACHE_SIZE, ttl=CATALOG_CACHE_TTL
+)
@@ -0,0 +1,41 @@
+import base64
+import datetime
+import json
+from typing import Any, List, Sequence
+
+from sqlalchemy import Column
+
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    """Непрозрачный курсор из значений ключа сортировки последней записи"""
+    raw = json.dumps([_dump(value) for value in values], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, columns: Sequence[Column]) -> List[Any]:
+    """Разбор курсора обратно в значения с типами колонок сортировки"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        if not isinstance(values, list) or len(values) != len(columns):
+            raise ValueError
+        return [_load(value, column) for value, column in zip(values, columns)]
+    except (ValueError, TypeError):
+        raise ValueError("Некорректный курсор")
+
+
+def _dump(value: Any) -> Any:
+    if isinstance(value, (datetime.date, datetime.datetime)):
+        return value.isoformat()
+    if isinstance(value, (int, float, str)) or value is None:
+        return value
+    return str(value)
+
+
+def _load(value: Any, column: Column) -> Any:
+    python_type = column.type.python_type
+    if value is None or isinstance(value, python_type):
+        return value
+    if python_type in (datetime.date, datetime.datetime):
+        return python_type.fromisoformat(value)
+    return python_type(value)
@@ -0,0 +1,61 @@
+import time
+
+from sqlalchemy import exc
+from sqlalchemy.pool import AsyncAdaptedQueuePool, Pool
+
+from API_for_library.metrics import DB_POOL_TIMEOUTS, DB_POOL_WAIT
+
+
+class InstrumentedPool(AsyncAdaptedQueuePool):
+    """
+    Пул соединений с учетом ожидания на checkout.
+
+    _do_get блокируется (в гринлете), пока в пуле нет свободного соединения,
+    поэтому его время - это и есть ожидание запроса на пуле.
+    """
+
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            self.timeouts += 1
+            DB_POOL_TIMEOUTS.inc()
+            raise
+        finally:
+            waited = time.perf_counter() - started
+            self.checkouts += 1
+            self.wait_total += waited
+            self.wait_max = max(self.wait_max, waited)
+            DB_POOL_WAIT.observe(waited)
+
+
+def pool_stats(pool: Pool) -> dict:
+    """Текущее состояние пула и накопленная статистика ожидания"""
+    stats = {"pool": type(pool).__name__}
+    if isinstance(pool, AsyncAdaptedQueuePool):
+        stats.update(
+            size=pool.size(),
+            checked_in=pool.checkedin(),
+            checked_out=pool.checkedout(),
+            overflow=pool.overflow(),
+            timeout=pool.timeout(),
+        )
+    if isinstance(pool, InstrumentedPool):
+        stats.update(
+            checkouts=pool.checkouts,
+            timeouts=pool.timeouts,
+            wait_total_ms=round(pool.wait_total * 1000, 3),
+            wait_avg_ms=round(pool.wait_total * 1000 / pool.checkouts, 3)
+            if pool.checkouts
+            else 0.0,
+            wait_max_ms=round(pool.wait_max * 1000, 3),
+        )
+    return stats
@@ -1,91 +1,336 @@
+import datetime
 import uuid
-from typing import Generic, TypeVar, Optional, List
+from functools import partial
+from typing import Generic, TypeVar, Optional, List, Sequence, Tuple
 
-from sqlalchemy import BinaryExpression, select, update, delete
+from sqlalchemy import (
+    BinaryExpression,
+    select,
+    insert,
+    update,
+    delete,
+    tuple_,
+    literal,
+    inspect,
+)
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import exc
-from sqlalchemy.orm import sessionmaker
 
+from API_for_library.cache import TTLCache
+from main import BULK_CHUNK_SIZE
 from . import Base
-from .session import engine
+from .pagination import encode_cursor, decode_cursor
+from .session import ON_PRIMARY, ON_REPLICA, after_commit, use_primary
 
 Model = TypeVar("Model", bound=Base)
 
-SessionLocal = sessionmaker(
-    bind=engine,
-    class_=AsyncSession,
-    expire_on_commit=False,
-)
-
 
 class DatabaseRepository(Generic[Model]):
+    """
+    Репозиторий поверх сессии запроса.
+
+    Методы не коммитят сами: изменения отправляются в базу через flush,
+    а коммит делает get_session в конце запроса.
+
+    Если передан cache, get() читает через него: в кэше лежат снимки колонок
+    (не объекты сессии), update() и delete() сбрасывают запись.
 
-    def __init__(self, model: type[Model], session: AsyncSession) -> None:
+    Чтение может уйти на реплику (см. RoutingSession), методы записи
+    закрепляют сессию за primary до конца запроса.
+    """
+
+    def __init__(
+        self,
+        model: type[Model],
+        session: AsyncSession,
+        cache: Optional[TTLCache[dict]] = None,
+    ) -> None:
         self.model = model
         self.session = session
+        self.cache = cache
 
     async def create(self, data: dict) -> Model:
-        """Создание новой записи"""
+        """Создание новой записи одним INSERT ... RETURNING"""
+        use_primary(self.session)
         try:
-            async with SessionLocal() as session:
-                instance = self.model(**data)
-                session.add(instance)
-                await session.commit()
-                await session.refresh(instance)
-                return instance
+            query = insert(self.model).values(**data).returning(self.model)
+            result = await self.session.execute(query)
+            return result.scalar_one()
         except IntegrityError as e:
-            await session.rollback()
+            await self.session.rollback()
             raise ValueError(f"Ошибка при создании записи: {e}")
 
     async def get(self, pk: uuid.UUID) -> Optional[Model]:
-        """Получение записи по pk"""
-        async with SessionLocal() as session:
-            query = select(self.model).filter(self.model.id == pk)
-            result = await session.execute(query)
-            return result.scalar_one_or_none()
+        """
+        Получение записи по pk.
+
+        Промах кэша читается с primary: отстающая реплика положила бы в кэш
+        строку, которую только что сбросил коммит.
+        """
+        if self.cache is None:
+            return await self._get(pk)
+        snapshot = self.cache.get(str(pk))
+        if snapshot is not None:
+            return self.model(**snapshot)
+        instance = await self._get(pk, bind_arguments=ON_PRIMARY)
+        if instance is not None:
+            self.cache.set(str(pk), self._snapshot(instance))
+        return instance
+
+    async def _get(
+        self, pk: uuid.UUID, bind_arguments: dict = ON_REPLICA
+    ) -> Optional[Model]:
+        query = select(self.model).filter(self.model.id == pk)
+        result = await self.session.execute(query, bind_arguments=bind_arguments)
+        return result.scalar_one_or_none()
+
+    def _snapshot(self, instance: Model) -> dict:
+        """Загруженные значения колонок, без отложенных и связей"""
+        loaded = inspect(instance).dict
+        return {
+            attr.key: loaded[attr.key]
+            for attr in inspect(self.model).column_attrs
+            if attr.key in loaded
+        }
+
+    def invalidate(self, pk: uuid.UUID) -> None:
+        """
+        Сбросить запись из кэша после коммита транзакции.
+
+        Если сбросить раньше, параллельный запрос успеет прочитать еще
+        не измененную строку и снова положить ее в кэш.
+        """
+        if self.cache is not None:
+            after_commit(self.session, partial(self.cache.pop, str(pk)))
 
     async def filter(self, *expressions: BinaryExpression) -> List[Model]:
         """Фильтрация записей по условию"""
-        async with SessionLocal() as session:
-            query = select(self.model).filter(*expressions)
-            result = await session.execute(query)
-            return result.scalars().all()
+        query = select(self.model).filter(*expressions)
+        result = await self.session.execute(query, bind_arguments=ON_REPLICA)
+        return result.scalars().all()
 
     async def update(self, pk: uuid.UUID, data: dict) -> Optional[Model]:
-        """Обновление записи"""
+        """
+        Обновление записи одним UPDATE ... RETURNING.
+
+        Возвращает обновленную запись или None, если записи с таким pk нет.
+        """
+        use_primary(self.session)
         try:
-            async with SessionLocal() as session:
-                query = (
-                    update(self.model)
-                    .where(self.model.id == pk)
-                    .values(**data)
-                    .execution_options(synchronize_session="fetch")
-                )
-                await session.execute(query)
-                await session.commit()
-                return await self.get(pk)
+            query = (
+                update(self.model)
+                .where(self.model.id == pk)
+                .values(**data)
+                .returning(self.model)
+                .execution_options(populate_existing=True)
+            )
+            result = await self.session.execute(query)
+            self.invalidate(pk)
+            return result.scalar_one_or_none()
         except exc.UnmappedInstanceError as e:
-            await session.rollback()
+            await self.session.rollback()
             raise ValueError(f"Ошибка при обновлении записи: {e}")
 
-    async def delete(self, pk: uuid.UUID) -> None:
-        """Удаление записи"""
+    async def delete(self, pk: uuid.UUID) -> bool:
+        """Удаление записи; False, если записи с таким pk не было"""
+        use_primary(self.session)
         try:
-            async with SessionLocal() as session:
-                query = delete(self.model).where(self.model.id == pk)
-                await session.execute(query)
-                await session.commit()
+            query = (
+                delete(self.model)
+                .where(self.model.id == pk)
+                .returning(self.model.id)
+            )
+            result = await self.session.execute(query)
+            self.invalidate(pk)
+            return result.scalar_one_or_none() is not None
         except exc.UnmappedInstanceError as e:
-            await session.rollback()
+            await self.session.rollback()
             raise ValueError(f"Ошибка при удалении записи: {e}")
 
+    async def bulk_create(
+        self, rows: List[dict], chunk_size: Optional[int] = None
+    ) -> int:
+        """Массовая вставка пачками, по одному executemany на пачку"""
+        use_primary(self.session)
+        for chunk in self._chunks(rows, chunk_size):
+            await self.session.execute(insert(self.model), chunk)
+        return len(rows)
+
+    async def bulk_update(
+        self, rows: List[dict], chunk_size: Optional[int] = None
+    ) -> int:
+        """
+        Массовое обновление по pk пачками.
+
+        В каждой строке обязателен id, остальные ключи - новые значения.
+        """
+        use_primary(self.session)
+        for chunk in self._chunks(rows, chunk_size):
+            await self.session.execute(update(self.model), chunk)
+            for row in chunk:
+                self.invalidate(row["id"])
+        return len(rows)
+
+    async def upsert(
+        self,
+        rows: List[dict],
+        conflict_columns: Sequence[str],
+        update_columns: Optional[Sequence[str]] = None,
+        chunk_size: Optional[int] = None,
+    ) -> int:
+        """
+        Вставка или обновление через INSERT ... ON CONFLICT пачками.
+
+        conflict_columns должны быть покрыты уникальным индексом. При
+        конфликте обновляются update_columns (по умолчанию все переданные
+        ключи, кроме conflict_columns); если обновлять нечего - DO NOTHING.
+        Дубликаты ключа внутри пачки схлопываются, побеждает последний.
+        """
+        use_primary(self.session)
+        if not rows:
+            return 0
+        self._columns(conflict_columns)
+        if update_columns is None:
+            keys = dict.fromkeys(key for row in rows for key in row)
+            update_columns = [key for key in keys if key not in conflict_columns]
+        columns = self._columns(update_columns)
+
+        query = pg_insert(self.model)
+        if columns:
+            set_ = {column.key: query.excluded[column.key] for column in columns}
+            for column in self.model.__table__.columns:
+                if column.onupdate is not None and column.key not in set_:
+                    set_[column.key] = column.onupdate.arg
+            query = query.on_conflict_do_update(
+                index_elements=list(conflict_columns), set_=set_
+            )
+        else:
+            query = query.on_conflict_do_nothing(index_elements=list(conflict_columns))
+
+        unique_rows = list(
+            {tuple(row[key] for key in conflict_columns): row for row in rows}.values()
+        )
+        for chunk in self._chunks(unique_rows, chunk_size):
+            await self.session.execute(query, chunk)
+        if self.cache is not None:
+            after_commit(self.session, self.cache.clear)
+        return len(unique_rows)
+
+    @staticmethod
+    def _chunks(rows: List[dict], chunk_size: Optional[int]):
+        size = chunk_size or BULK_CHUNK_SIZE
+        for start in range(0, len(rows), size):
+            yield rows[start : start + size]
+
     async def all(self) -> List[Model]:
         """Получение всех записей из таблицы"""
         try:
-            async with SessionLocal() as session:
-                query = select(self.model)
-                result = await session.execute(query)
-                return result.scalars().all()
+            query = select(self.model)
+            result = await self.session.execute(query, bind_arguments=ON_REPLICA)
+            return result.scalars().all()
         except Exception as e:
             raise ValueError(f"Ошибка при получении записей: {e}")
+
+    async def project(
+        self, columns: Sequence[str], *expressions: BinaryExpression
+    ) -> List[dict]:
+        """Выборка только нужных колонок, строки Core без ORM-объектов"""
+        query = select(*self._columns(columns)).filter(*expressions)
+        result = await self.session.execute(query, bind_arguments=ON_REPLICA)
+        return [dict(row) for row in result.mappings()]
+
+    async def paginate(
+        self,
+        *expressions: BinaryExpression,
+        limit: int,
+        cursor: Optional[str] = None,
+        order_by: Optional[Sequence] = None,
+        columns: Optional[Sequence[str]] = None,
+    ) -> Tuple[List, Optional[str]]:
+        """
+        Постраничная выборка по ключу сортировки (keyset).
+
+        По умолчанию сортирует по (created_at, id). Возвращает страницу и
+        курсор следующей страницы, None если страница последняя. Если заданы
+        columns, страница состоит из словарей только с этими колонками.
+        """
+        keys = list(order_by or (self.model.created_at, self.model.id))
+        if columns:
+            selected = list(dict.fromkeys([*columns, *(key.key for key in keys)]))
+            query = select(*self._columns(selected))
+        else:
+            query = select(self.model)
+        query = query.filter(*expressions)
+        if cursor:
+            values = decode_cursor(cursor, keys)
+            bounds = [literal(value, key.type) for value, key in zip(values, keys)]
+            query = query.filter(tuple_(*keys) > tuple_(*bounds))
+        query = query.order_by(*keys).limit(limit + 1)
+        result = await self.session.execute(query, bind_arguments=ON_REPLICA)
+        items = result.mappings().all() if columns else result.scalars().all()
+
+        next_cursor = None
+        if len(items) > limit:
+            items = items[:limit]
+            last = items[-1]
+            next_cursor = encode_cursor(
+                [last[key.key] if columns else getattr(last, key.key) for key in keys]
+            )
+        if columns:
+            items = [{name: row[name] for name in columns} for row in items]
+        return items, next_cursor
+
+    def _columns(self, names: Sequence[str]) -> list:
+        columns = inspect(self.model).columns
+        unknown = [name for name in names if name not in columns]
+        if unknown:
+            raise ValueError(f"Неизвестные колонки: {', '.join(unknown)}")
+        return [columns[name] for name in names]
+
+    async def copy(self, rows: List[dict]) -> int:
+        """
+        Массовая вставка через COPY в транзакции сессии (только asyncpg).
+
+        Значения по умолчанию колонок подставляются на стороне Python,
+        вычисляемые колонки пропускаются.
+        """
+        use_primary(self.session)
+        if not rows:
+            return 0
+        columns = [
+            column
+            for column in self.model.__table__.columns
+            if column.computed is None
+        ]
+        now = datetime.datetime.now()
+        records = [
+            tuple(
+                row[column.key] if column.key in row else self._default(column, now)
+                for column in columns
+            )
+            for row in rows
+        ]
+
+        connection = await self.session.connection()
+        raw = (await connection.get_raw_connection()).driver_connection
+        if not raw.is_in_transaction():
+            await connection.execute(select(literal(1)))
+        await raw.copy_records_to_table(
+            self.model.__table__.name,
+            records=records,
+            columns=[column.name for column in columns],
+        )
+        return len(records)
+
+    @staticmethod
+    def _default(column, now: datetime.datetime):
+        default = column.default
+        if default is None:
+            return None
+        if default.is_callable:
+            return default.arg(None)
+        if default.is_clause_element:
+            return now
+        return default.arg
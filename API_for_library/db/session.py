@@ -1,15 +1,227 @@
-from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
-from sqlalchemy.orm import sessionmaker
-from contextlib import asynccontextmanager
+import inspect
+import uuid
+from typing import Any, AsyncIterator, Callable, Optional
 
-from main import DB_URL
+from sqlalchemy import Select, event
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, create_async_engine
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.pool import NullPool
 
-engine = create_async_engine(DB_URL, echo=True)
+from main import (
+    DB_URL,
+    DB_REPLICA_URL,
+    DB_ECHO,
+    DB_POOL_SIZE,
+    DB_MAX_OVERFLOW,
+    DB_POOL_TIMEOUT,
+    DB_POOL_PRE_PING,
+    DB_POOL_RECYCLE,
+    DB_STATEMENT_CACHE_SIZE,
+    DB_PGBOUNCER,
+    SLOW_QUERY_THRESHOLD_MS,
+    SLOW_QUERY_EXPLAIN_SAMPLE,
+    SLOW_QUERY_LOG_FILE,
+    SLOW_QUERY_LOG_MAX_BYTES,
+    SLOW_QUERY_LOG_BACKUPS,
+)
+from API_for_library.metrics import instrument_engine
+from .pool import InstrumentedPool
+from .slow_queries import SlowQueryLog
 
-async_session_maker = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
 
+def prepared_statement_name() -> str:
+    """Уникальное имя prepared statement, чтобы не пересекаться на чужом бэкенде"""
+    return f"__asyncpg_{uuid.uuid4()}__"
 
-@asynccontextmanager
-async def get_session() -> AsyncSession:
+
+def build_engine(url: str, pgbouncer: bool = DB_PGBOUNCER) -> AsyncEngine:
+    """
+    Движок приложения.
+
+    В режиме pgbouncer (PgBouncer в transaction mode) пулом соединений
+    управляет PgBouncer: в приложении NullPool, кэши prepared statements
+    asyncpg и SQLAlchemy выключены, а имена statement-ов уникальны, так как
+    соседние транзакции могут попасть на другое серверное соединение.
+    """
+    if pgbouncer:
+        return create_async_engine(
+            url,
+            echo=DB_ECHO,
+            poolclass=NullPool,
+            connect_args={
+                "statement_cache_size": 0,
+                "prepared_statement_cache_size": 0,
+                "prepared_statement_name_func": prepared_statement_name,
+            },
+        )
+    return create_async_engine(
+        url,
+        echo=DB_ECHO,
+        poolclass=InstrumentedPool,
+        pool_size=DB_POOL_SIZE,
+        max_overflow=DB_MAX_OVERFLOW,
+        pool_timeout=DB_POOL_TIMEOUT,
+        pool_pre_ping=DB_POOL_PRE_PING,
+        pool_recycle=DB_POOL_RECYCLE,
+        connect_args={"statement_cache_size": DB_STATEMENT_CACHE_SIZE},
+    )
+
+
+engine: Optional[AsyncEngine] = None
+replica_engine: Optional[AsyncEngine] = None
+_session_maker: Optional[sessionmaker] = None
+
+PRIMARY = "primary"
+REPLICA = "replica"
+ON_PRIMARY = {PRIMARY: True}
+ON_REPLICA = {REPLICA: True}
+AFTER_COMMIT = "after_commit"
+
+
+class RoutingSession(Session):
+    """
+    Сессия, которая отправляет на реплику только явно помеченное чтение.
+
+    На реплику уходят простые SELECT (без FOR UPDATE), выполненные с
+    bind_arguments=ON_REPLICA, пока сессия ничего не писала; так помечены
+    чтения DatabaseRepository и поиска. Все остальное, в том числе сырые
+    session.execute(), идет на primary: проверки перед записью (существует
+    ли автор, занят ли email) не должны читать отстающую реплику.
+
+    Первый же не-SELECT, flush или use_primary() делает сессию "липкой":
+    все дальнейшие запросы запроса идут на primary, чтобы читать свои же
+    записи. Без DB_REPLICA_URL все идет на primary.
+    """
+
+    def get_bind(self, mapper=None, clause=None, **kw):
+        if (
+            replica_engine is not None
+            and kw.get(REPLICA)
+            and not self.info.get(PRIMARY)
+            and not self._flushing
+            and isinstance(clause, Select)
+            and clause._for_update_arg is None
+        ):
+            return replica_engine.sync_engine
+        if self._flushing or not isinstance(clause, Select):
+            self.info[PRIMARY] = True
+        return engine.sync_engine
+
+
+def use_primary(session: AsyncSession) -> None:
+    """
+    Закрепить сессию за primary до конца запроса.
+
+    Нужно перед SELECT, которые на самом деле пишут (CTE с UPDATE/INSERT)
+    или должны видеть только что записанное.
+    """
+    session.info[PRIMARY] = True
+
+
+def after_commit(session: AsyncSession, callback: Callable[[], Any]) -> None:
+    """
+    Выполнить callback после коммита транзакции запроса.
+
+    Сброс кэшей и прочие побочные эффекты нельзя делать до коммита:
+    параллельный запрос успеет прочитать старую строку и положить ее обратно.
+    При откате транзакции отложенные callback-и выбрасываются. Callback может
+    быть и корутинной функцией.
+    """
+    session.info.setdefault(AFTER_COMMIT, []).append(callback)
+
+
+@event.listens_for(RoutingSession, "after_soft_rollback")
+def _drop_after_commit(session: Session, previous_transaction) -> None:
+    # Откат точки сохранения (begin_nested) внешнюю транзакцию не отменяет
+    if previous_transaction.parent is None:
+        session.info.pop(AFTER_COMMIT, None)
+
+
+async def run_after_commit(session: AsyncSession) -> None:
+    """Выполнить callback-и, накопленные с прошлого коммита"""
+    for callback in session.info.pop(AFTER_COMMIT, []):
+        result = callback()
+        if inspect.isawaitable(result):
+            await result
+
+
+def _instrument(target: AsyncEngine) -> None:
+    instrument_engine(target)
+    if SLOW_QUERY_THRESHOLD_MS > 0:
+        SlowQueryLog(
+            SLOW_QUERY_THRESHOLD_MS,
+            SLOW_QUERY_LOG_FILE,
+            explain_sample=SLOW_QUERY_EXPLAIN_SAMPLE,
+            max_bytes=SLOW_QUERY_LOG_MAX_BYTES,
+            backups=SLOW_QUERY_LOG_BACKUPS,
+        ).install(target)
+
+
+def init_engine(url: Optional[str] = None) -> AsyncEngine:
+    """
+    Создание движка приложения (в lifespan или при первом обращении).
+
+    Движок не создается при импорте модуля, поэтому импорт роутеров и
+    моделей не требует DB_URL и не трогает сеть. Если задан DB_REPLICA_URL,
+    рядом создается движок реплики для чтения.
+    """
+    global engine, replica_engine, _session_maker
+    if engine is not None:
+        return engine
+    engine = build_engine(url or DB_URL)
+    _instrument(engine)
+    if DB_REPLICA_URL:
+        replica_engine = build_engine(DB_REPLICA_URL)
+        _instrument(replica_engine)
+    _session_maker = sessionmaker(
+        class_=AsyncSession,
+        sync_session_class=RoutingSession,
+        expire_on_commit=False,
+    )
+    return engine
+
+
+async def dispose_engine() -> None:
+    """Закрытие соединений пулов при остановке приложения"""
+    global engine, replica_engine, _session_maker
+    for target in (engine, replica_engine):
+        if target is not None:
+            await target.dispose()
+    engine = None
+    replica_engine = None
+    _session_maker = None
+
+
+def get_engine() -> AsyncEngine:
+    return init_engine()
+
+
+def get_replica_engine() -> Optional[AsyncEngine]:
+    init_engine()
+    return replica_engine
+
+
+def async_session_maker() -> AsyncSession:
+    """Новая сессия на движках приложения"""
+    if _session_maker is None:
+        init_engine()
+    return _session_maker()
+
+
+async def get_session() -> AsyncIterator[AsyncSession]:
+    """
+    Сессия на время запроса (unit of work).
+
+    FastAPI кэширует зависимость в рамках запроса, поэтому все репозитории,
+    созданные через Depends(get_session), работают в одной транзакции на одном
+    соединении. Коммит делается один раз в конце запроса, при ошибке - откат.
+    После коммита выполняются callback-и из after_commit().
+    """
     async with async_session_maker() as session:
-        yield session
+        try:
+            yield session
+            await session.commit()
+        except Exception:
+            await session.rollback()
+            raise
+        await run_after_commit(session)
@@ -0,0 +1,152 @@
+import asyncio
+import json
+import logging
+import os
+import random
+import time
+from logging.handlers import RotatingFileHandler
+from typing import Optional
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from API_for_library.metrics import current_route
+
+logger = logging.getLogger(__name__)
+
+
+class SlowQueryLog:
+    """
+    Журнал медленных запросов движка.
+
+    Запросы дольше threshold_ms пишутся в ротируемый файл JSON-строками:
+    текст запроса, форма параметров (типы, без значений), длительность и
+    маршрут, из которого пришел запрос. Доля explain_sample медленных
+    SELECT повторяется через EXPLAIN (ANALYZE, BUFFERS) на отдельном
+    соединении в фоне, план пишется в ту же запись.
+    """
+
+    def __init__(
+        self,
+        threshold_ms: float,
+        path: str,
+        explain_sample: float = 0.0,
+        max_bytes: int = 10 * 1024 * 1024,
+        backups: int = 5,
+    ) -> None:
+        self.threshold = threshold_ms / 1000
+        self.explain_sample = explain_sample
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self.engine: Optional[AsyncEngine] = None
+        self._explaining = False
+        self._tasks: set = set()
+        self._writer: Optional[logging.Logger] = None
+
+    def install(self, engine: AsyncEngine) -> None:
+        self.engine = engine
+        event.listen(engine.sync_engine, "before_cursor_execute", self._before)
+        event.listen(engine.sync_engine, "after_cursor_execute", self._after)
+
+    def _before(self, conn, cursor, statement, parameters, context, many):
+        context._slow_query_started = time.perf_counter()
+
+    def _after(self, conn, cursor, statement, parameters, context, many):
+        started = getattr(context, "_slow_query_started", None)
+        if started is None or conn.info.get("slow_query_explain"):
+            return
+        duration = time.perf_counter() - started
+        if duration < self.threshold:
+            return
+        record = {
+            "duration_ms": round(duration * 1000, 3),
+            "route": current_route(),
+            "statement": statement,
+            "params": params_shape(parameters, many),
+        }
+        if self._should_explain(statement):
+            self._schedule_explain(record, statement, parameters)
+        else:
+            self._write(record)
+
+    def _should_explain(self, statement: str) -> bool:
+        """Только SELECT без блокировок: EXPLAIN ANALYZE выполняет запрос"""
+        if self._explaining or random.random() >= self.explain_sample:
+            return False
+        normalized = statement.lstrip().upper()
+        return normalized.startswith("SELECT") and " FOR UPDATE" not in normalized
+
+    def _schedule_explain(self, record: dict, statement: str, parameters) -> None:
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self._write(record)
+            return
+        self._explaining = True
+        task = loop.create_task(self._explain(record, statement, parameters))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _explain(self, record: dict, statement: str, parameters) -> None:
+        try:
+            async with self.engine.connect() as conn:
+                conn.sync_connection.info["slow_query_explain"] = True
+                try:
+                    result = await conn.exec_driver_sql(
+                        f"EXPLAIN (ANALYZE, BUFFERS) {statement}", parameters
+                    )
+                    record["plan"] = [row[0] for row in result]
+                finally:
+                    conn.sync_connection.info.pop("slow_query_explain", None)
+                    await conn.rollback()
+        except Exception as e:
+            record["plan_error"] = str(e)
+        finally:
+            self._explaining = False
+            self._write(record)
+
+    def _write(self, record: dict) -> None:
+        try:
+            self._get_writer().info(json.dumps(record, ensure_ascii=False, default=str))
+        except OSError:
+            logger.exception("Не удалось записать медленный запрос")
+
+    def _get_writer(self) -> logging.Logger:
+        """
+        Логгер файла журнала, один на путь.
+
+        Движков с журналом может быть несколько (primary и реплика), и они
+        пишут в один файл через один обработчик: два RotatingFileHandler на
+        одном файле дублировали бы записи и ломали ротацию.
+        """
+        if self._writer is None:
+            path = os.path.abspath(self.path)
+            writer = logging.getLogger(f"{__name__}.file:{path}")
+            if not writer.handlers:
+                directory = os.path.dirname(path)
+                os.makedirs(directory, exist_ok=True)
+                handler = RotatingFileHandler(
+                    path,
+                    maxBytes=self.max_bytes,
+                    backupCount=self.backups,
+                    encoding="utf-8",
+                )
+                handler.setFormatter(
+                    logging.Formatter('{"time": "%(asctime)s", "query": %(message)s}')
+                )
+                writer.setLevel(logging.INFO)
+                writer.propagate = False
+                writer.addHandler(handler)
+            self._writer = writer
+        return self._writer
+
+
+def params_shape(parameters, many: bool):
+    """Типы параметров без значений: в параметрах бывают email и хэши паролей"""
+    if many:
+        rows = list(parameters or [])
+        return {"rows": len(rows), "row": params_shape(rows[0], False) if rows else []}
+    if isinstance(parameters, dict):
+        return {key: type(value).__name__ for key, value in parameters.items()}
+    return [type(value).__name__ for value in parameters or ()]
@@ -0,0 +1,61 @@
+import asyncio
+import logging
+import time
+import uuid
+
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+from sqlalchemy.pool import NullPool
+
+from API_for_library.models.authors import Authors
+from API_for_library.models.books import Books
+from API_for_library.models.user import User
+from .repository import DatabaseRepository
+
+logger = logging.getLogger(__name__)
+
+
+async def run_hot_queries(session: AsyncSession) -> None:
+    """
+    Запросы горячих маршрутов, теми же методами репозитория.
+
+    Текст SQL совпадает с тем, что шлют роутеры, поэтому после прогрева
+    он уже скомпилирован SQLAlchemy и подготовлен asyncpg на соединении.
+    """
+    missing = uuid.uuid4()
+    await DatabaseRepository(User, session).get(missing)
+    await DatabaseRepository(User, session).filter(User.email == "")
+    await DatabaseRepository(Books, session).get(missing)
+    await DatabaseRepository(Books, session).paginate(limit=50)
+    await DatabaseRepository(Authors, session).get(missing)
+
+
+async def warm_up(engine: AsyncEngine, connections: int) -> None:
+    """
+    Открывает connections соединений пула разом и прогревает на каждом
+    горячие запросы, чтобы первые запросы не платили за connect и parse.
+    С NullPool соединения не переживают прогрев, остается только кэш
+    компиляции SQLAlchemy, для него хватает одного прохода.
+    """
+    if isinstance(engine.pool, NullPool):
+        connections = min(connections, 1)
+    if connections <= 0:
+        return
+    started = time.perf_counter()
+
+    async def warm_connection() -> None:
+        async with engine.connect() as conn:
+            async with AsyncSession(bind=conn) as session:
+                await run_hot_queries(session)
+                await session.rollback()
+
+    results = await asyncio.gather(
+        *(warm_connection() for _ in range(connections)), return_exceptions=True
+    )
+    failed = [result for result in results if isinstance(result, Exception)]
+    for error in failed[:1]:
+        logger.warning("Прогрев соединений с ошибкой: %s", error)
+    logger.info(
+        "Прогрето %d соединений за %.1f мс",
+        connections - len(failed),
+        (time.perf_counter() - started) * 1000,
+    )
@@ -0,0 +1,214 @@
+import glob
+import os
+import sys
+import time
+from contextvars import ContextVar
+from typing import Optional
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+HTTP_REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds",
+    "Время обработки HTTP-запроса",
+    ["method", "route", "status"],
+)
+HTTP_REQUESTS_IN_PROGRESS = Gauge(
+    "http_requests_in_progress",
+    "HTTP-запросы в обработке",
+    ["method"],
+    multiprocess_mode="livesum",
+)
+DB_STATEMENT_DURATION = Histogram(
+    "db_statement_duration_seconds",
+    "Время выполнения SQL-запроса (от отправки до ответа драйвера)",
+    ["operation"],
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5),
+)
+DB_POOL_WAIT = Histogram(
+    "db_pool_checkout_wait_seconds",
+    "Ожидание свободного соединения в пуле",
+    buckets=(0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 5, 30),
+)
+DB_POOL_TIMEOUTS = Counter(
+    "db_pool_checkout_timeouts_total",
+    "Запросы, не дождавшиеся соединения из пула",
+)
+PASSWORD_HASH_DURATION = Histogram(
+    "password_hash_duration_seconds",
+    "Время bcrypt вместе с очередью пула",
+    ["operation"],
+    buckets=(0.01, 0.05, 0.1, 0.2, 0.3, 0.5, 0.75, 1, 2, 5),
+)
+PASSWORD_HASH_IN_FLIGHT = Gauge(
+    "password_hash_in_flight",
+    "Задачи bcrypt, выполняющиеся в пуле",
+    multiprocess_mode="livesum",
+)
+PASSWORD_HASH_QUEUED = Gauge(
+    "password_hash_queued",
+    "Задачи bcrypt, ждущие свободного места в пуле",
+    multiprocess_mode="livesum",
+)
+JWT_VERIFY_DURATION = Histogram(
+    "jwt_verify_duration_seconds",
+    "Время проверки JWT",
+    ["result"],
+    buckets=(0.00001, 0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.01),
+)
+CIRCULATION_OPERATIONS = Counter(
+    "circulation_operations_total",
+    "Выдачи и возвраты книг",
+    ["operation", "outcome"],
+)
+
+SQL_OPERATIONS = {"SELECT", "INSERT", "UPDATE", "DELETE", "WITH", "COPY"}
+
+request_scope: ContextVar[Optional[dict]] = ContextVar("request_scope", default=None)
+
+
+def current_route() -> Optional[str]:
+    """Маршрут текущего запроса ("GET /books/{book_id}"), вне запроса - None"""
+    scope = request_scope.get()
+    if scope is None:
+        return None
+    route = getattr(scope.get("route"), "path", scope.get("path"))
+    return f"{scope['method']} {route}"
+
+
+def instrument_engine(engine: AsyncEngine) -> None:
+    """Учет времени SQL-запросов через события движка"""
+
+    @event.listens_for(engine.sync_engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, many):
+        context._metrics_started = time.perf_counter()
+
+    @event.listens_for(engine.sync_engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, many):
+        started = getattr(context, "_metrics_started", None)
+        if started is None:
+            return
+        DB_STATEMENT_DURATION.labels(statement_operation(statement)).observe(
+            time.perf_counter() - started
+        )
+
+
+def statement_operation(statement: str) -> str:
+    """Тип запроса для метки, без риска раздуть число серий"""
+    operation = statement.lstrip().split(None, 1)[0].upper() if statement else ""
+    return operation if operation in SQL_OPERATIONS else "OTHER"
+
+
+def count_circulation(operation: str, results: list) -> None:
+    """Счетчики по результатам пакетной выдачи или возврата"""
+    ok = sum(1 for item in results if item["ok"])
+    if ok:
+        CIRCULATION_OPERATIONS.labels(operation, "ok").inc(ok)
+    if len(results) > ok:
+        CIRCULATION_OPERATIONS.labels(operation, "failed").inc(len(results) - ok)
+
+
+def render_metrics() -> bytes:
+    """
+    Метрики в текстовом формате Prometheus.
+
+    При нескольких воркерах uvicorn нужно задать PROMETHEUS_MULTIPROC_DIR,
+    тогда метрики собираются со всех процессов (main.py в режиме prod
+    задает его сам).
+    """
+    if "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry)
+    return generate_latest(REGISTRY)
+
+
+def _process_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def mark_process_dead(pid: int) -> None:
+    """
+    Убрать live-гауджи процесса из PROMETHEUS_MULTIPROC_DIR.
+
+    В uvicorn нет хука child_exit, как в gunicorn, поэтому воркер вызывает
+    это сам при остановке, а на старте - mark_dead_processes().
+    """
+    directory = os.environ.get("PROMETHEUS_MULTIPROC_DIR")
+    if directory:
+        multiprocess.mark_process_dead(pid, directory)
+
+
+def mark_dead_processes() -> None:
+    """Убрать live-гауджи процессов, которых уже нет (упавших воркеров)"""
+    directory = os.environ.get("PROMETHEUS_MULTIPROC_DIR")
+    if not directory or sys.platform == "win32":
+        # os.kill(pid, 0) на Windows завершает процесс, а не проверяет его
+        return
+    pids = {
+        int(os.path.basename(path)[: -len(".db")].rsplit("_", 1)[1])
+        for path in glob.glob(os.path.join(directory, "gauge_live*_*.db"))
+    }
+    for pid in pids:
+        if not _process_alive(pid):
+            mark_process_dead(pid)
+
+
+class MetricsMiddleware:
+    """
+    ASGI-middleware: время запросов по маршруту и статусу, запросы в работе.
+
+    Также кладет scope запроса в request_scope, чтобы SQL-события могли
+    узнать, из какого маршрута пришел запрос.
+
+    Маршрут берется из шаблона пути (/books/{book_id}), а не из URL, чтобы
+    число серий не росло с числом id.
+    """
+
+    def __init__(self, app) -> None:
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        status_code = 500
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        in_progress = HTTP_REQUESTS_IN_PROGRESS.labels(method)
+        in_progress.inc()
+        token = request_scope.set(scope)
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            in_progress.dec()
+            request_scope.reset(token)
+            route = getattr(scope.get("route"), "path", "unmatched")
+            HTTP_REQUEST_DURATION.labels(method, route, str(status_code)).observe(
+                time.perf_counter() - started
+            )
+
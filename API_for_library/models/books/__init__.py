@@ -1,16 +1,39 @@
 import uuid
 
-from sqlalchemy import Column, String, UUID, Date, Integer, ForeignKey
-from sqlalchemy.orm import relationship
+from sqlalchemy import (
+    Column,
+    String,
+    UUID,
+    Date,
+    Integer,
+    ForeignKey,
+    Index,
+    Computed,
+)
+from sqlalchemy.dialects.postgresql import TSVECTOR
+from sqlalchemy.orm import relationship, deferred
 from datetime import datetime
 
 from API_for_library.db import Base
 from API_for_library.db.mixins import TimestampMixin
 from API_for_library.models.authors import Authors
 
+SEARCH_CONFIG = "simple"
+
+SEARCH_VECTOR_SQL = (
+    f"setweight(to_tsvector('{SEARCH_CONFIG}', coalesce(title, '')), 'A') || "
+    f"setweight(to_tsvector('{SEARCH_CONFIG}', coalesce(authors, '')), 'B') || "
+    f"setweight(to_tsvector('{SEARCH_CONFIG}', coalesce(genre, '')), 'C') || "
+    f"setweight(to_tsvector('{SEARCH_CONFIG}', coalesce(description, '')), 'D')"
+)
+
 
 class Books(Base, TimestampMixin):
     __tablename__ = "books"
+    __table_args__ = (
+        Index("ix_books_created_at_id", "created_at", "id"),
+        Index("ix_books_search_vector", "search_vector", postgresql_using="gin"),
+    )
 
     id = Column(UUID, primary_key=True, default=uuid.uuid4, nullable=False)
     title = Column(String, nullable=False)
@@ -20,7 +43,10 @@ class Books(Base, TimestampMixin):
     counter = Column(Integer, nullable=False)
     genre = Column(String, nullable=True)
     author_id = Column(
-        UUID, ForeignKey("authors.id", ondelete="CASCADE"), nullable=False
+        UUID, ForeignKey("authors.id", ondelete="CASCADE"), nullable=False, index=True
+    )
+    search_vector = deferred(
+        Column(TSVECTOR, Computed(SEARCH_VECTOR_SQL, persisted=True), nullable=True)
     )
 
     author = relationship("Authors", back_populates="books")
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, UUID, ForeignKey, Date, Boolean
+from sqlalchemy import Column, UUID, ForeignKey, Date, Boolean, Index, text
 from sqlalchemy.orm import relationship
 import uuid
 import datetime
@@ -10,10 +10,21 @@ from API_for_library.models.user import User
 
 class Issue(Base, TimestampMixin):
     __tablename__ = "issued_books"
+    __table_args__ = (
+        Index(
+            "ix_issued_books_active_user_id",
+            "user_id",
+            postgresql_where=text("returned IS NOT TRUE"),
+        ),
+    )
 
     id = Column(UUID, primary_key=True, default=uuid.uuid4, nullable=False)
-    book_id = Column(UUID, ForeignKey("books.id", ondelete="CASCADE"), nullable=False)
-    user_id = Column(UUID, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    book_id = Column(
+        UUID, ForeignKey("books.id", ondelete="CASCADE"), nullable=False, index=True
+    )
+    user_id = Column(
+        UUID, ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True
+    )
     issue_date = Column(Date, nullable=False, default=datetime.date.today)
     return_date = Column(Date, nullable=False)
     returned = Column(Boolean, default=False)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, UUID, String, Date, Text
+from sqlalchemy import Column, UUID, String, Date, Text, Index
 from sqlalchemy.orm import relationship
 import uuid
 import datetime
@@ -8,6 +8,10 @@ from API_for_library.db.mixins import TimestampMixin
 
 class Logs(Base, TimestampMixin):
     __tablename__ = "logs"
+    __table_args__ = (
+        Index("ix_logs_event_type_timestamp", "event_type", "timestamp"),
+        Index("ix_logs_timestamp", "timestamp"),
+    )
 
     id = Column(UUID, primary_key=True, default=uuid.uuid4, nullable=False)
     event_type = Column(String, nullable=False)
@@ -0,0 +1,60 @@
+"""add indexes for hot query predicates
+
+Revision ID: 787d167f26f7
+Revises: fa0bdb78cff7
+Create Date: 2026-10-17 12:21:07.503316
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "787d167f26f7"
+down_revision: Union[str, None] = "fa0bdb78cff7"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Индексы строятся CONCURRENTLY, чтобы не блокировать запись в живые таблицы,
+# поэтому миграция идет вне транзакции.
+INDEXES = [
+    ("ix_books_author_id", "books", ["author_id"], {}),
+    ("ix_issued_books_user_id", "issued_books", ["user_id"], {}),
+    ("ix_issued_books_book_id", "issued_books", ["book_id"], {}),
+    (
+        "ix_issued_books_active_user_id",
+        "issued_books",
+        ["user_id"],
+        {"postgresql_where": sa.text("returned IS NOT TRUE")},
+    ),
+    ("ix_logs_event_type_timestamp", "logs", ["event_type", "timestamp"], {}),
+    ("ix_logs_timestamp", "logs", ["timestamp"], {}),
+]
+
+
+def upgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, table, columns, kwargs in INDEXES:
+            op.create_index(
+                name,
+                table,
+                columns,
+                unique=False,
+                postgresql_concurrently=True,
+                if_not_exists=True,
+                **kwargs,
+            )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, table, _, _ in reversed(INDEXES):
+            op.drop_index(
+                name,
+                table_name=table,
+                postgresql_concurrently=True,
+                if_exists=True,
+            )
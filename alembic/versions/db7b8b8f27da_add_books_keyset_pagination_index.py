@@ -0,0 +1,29 @@
+"""add books keyset pagination index
+
+Revision ID: db7b8b8f27da
+Revises: 662f109c7d9a
+Create Date: 2026-10-17 10:12:40.118204
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "db7b8b8f27da"
+down_revision: Union[str, None] = "662f109c7d9a"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        "ix_books_created_at_id", "books", ["created_at", "id"], unique=False
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_books_created_at_id", table_name="books")
@@ -0,0 +1,139 @@
+"""
+Холодный старт: время до готовности и первые запросы нового процесса.
+
+Запуск из корня проекта (нужен существующий читатель, см. scripts/seed.py):
+    python -m benchmarks.cold_start --email reader@example.com --password secret
+
+Для каждого режима несколько раз запускается отдельный процесс uvicorn:
+cold - DB_WARMUP_CONNECTIONS=0 (соединения открываются первыми запросами),
+warm - прогрев пула и горячих запросов в lifespan.
+Меряется время от запуска процесса до того, как порт принимает соединения
+(uvicorn слушает порт только после старта lifespan), первый логин, первый
+GET /books/ и пачка из --burst параллельных запросов сразу после старта.
+В таблице медианы по --runs запускам.
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+import httpx
+
+MODES = {
+    "cold": {"DB_WARMUP_CONNECTIONS": "0"},
+    "warm": {},
+}
+
+
+async def wait_ready(port: int, process: subprocess.Popen, timeout: float) -> None:
+    deadline = time.perf_counter() + timeout
+    while time.perf_counter() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"uvicorn завершился с кодом {process.returncode}")
+        try:
+            _, writer = await asyncio.open_connection("127.0.0.1", port)
+            writer.close()
+            await writer.wait_closed()
+            return
+        except OSError:
+            await asyncio.sleep(0.005)
+    raise TimeoutError("uvicorn не поднялся")
+
+
+async def timed(coro) -> tuple:
+    started = time.perf_counter()
+    response = await coro
+    response.raise_for_status()
+    return (time.perf_counter() - started) * 1000, response
+
+
+async def run_once(mode: str, args) -> dict:
+    env = {**os.environ, **MODES[mode]}
+    command = [
+        sys.executable,
+        "-m",
+        "uvicorn",
+        "API_for_library.api:create_api",
+        "--factory",
+        "--port",
+        str(args.port),
+        "--log-level",
+        "warning",
+    ]
+    started = time.perf_counter()
+    process = subprocess.Popen(command, env=env)
+    try:
+        await wait_ready(args.port, process, args.timeout)
+        ready_ms = (time.perf_counter() - started) * 1000
+
+        base_url = f"http://127.0.0.1:{args.port}"
+        async with httpx.AsyncClient(base_url=base_url) as client:
+            login_ms, response = await timed(
+                client.post(
+                    "/auth/token",
+                    json={"email": args.email, "password": args.password},
+                )
+            )
+            client.headers["Authorization"] = (
+                f"Bearer {response.json()['access_token']}"
+            )
+            first_ms, response = await timed(client.get("/books/"))
+            items = response.json()["items"]
+            paths = [f"/books/{item['id']}" for item in items] or ["/books/"]
+            burst = await asyncio.gather(
+                *(
+                    timed(client.get(paths[i % len(paths)]))
+                    for i in range(args.burst)
+                )
+            )
+        burst_ms = sorted(ms for ms, _ in burst)
+        return {
+            "ready_ms": ready_ms,
+            "login_ms": login_ms,
+            "first_list_ms": first_ms,
+            "burst_p50_ms": burst_ms[len(burst_ms) // 2],
+            "burst_max_ms": burst_ms[-1],
+        }
+    finally:
+        process.terminate()
+        process.wait()
+
+
+async def main(args) -> None:
+    rows = []
+    for mode in args.modes:
+        runs = [await run_once(mode, args) for _ in range(args.runs)]
+        rows.append(
+            {
+                "mode": mode,
+                **{
+                    key: round(statistics.median(run[key] for run in runs), 1)
+                    for key in runs[0]
+                },
+            }
+        )
+
+    header = list(rows[0])
+    print(" | ".join(f"{key:>13}" for key in header))
+    for row in rows:
+        print(" | ".join(f"{str(row[key]):>13}" for key in header))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--email", required=True)
+    parser.add_argument("--password", required=True)
+    parser.add_argument("--port", type=int, default=8100)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--burst", type=int, default=20)
+    parser.add_argument("--timeout", type=float, default=30)
+    parser.add_argument(
+        "--modes", nargs="+", choices=list(MODES), default=list(MODES)
+    )
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,270 @@
+"""
+Нагрузочные прогоны приложения и сравнение результатов.
+
+Приложение (API_for_library.api:create_api) поднимается в отдельном
+процессе uvicorn на базе из .env, нагрузку дают параллельные асинхронные
+клиенты httpx в замкнутом цикле. Каталог нужно заранее заполнить:
+    python -m scripts.seed
+
+Прогон:
+    python -m benchmarks.harness run --scenario browse --concurrency 50 \\
+        --duration 30 --out bench/browse.json
+
+Сценарии: browse (чтение каталога), checkout (выдачи и возвраты горячих
+книг), login (вход и профиль), import (импорт NDJSON администратором).
+
+Учетки прогона (bench-<run_id>-...) создаются через API и после прогона
+удаляются, если не задан --keep-accounts.
+
+В JSON попадают p50/p95/p99, RPS, коды ответов по эндпоинтам и серверная
+сторона из /metrics: SQL-запросов на HTTP-запрос, время в базе, ожидание
+соединения в пуле, время bcrypt.
+
+Сравнение (первый файл - базовый):
+    python -m benchmarks.harness compare bench/before.json bench/after.json
+"""
+
+import argparse
+import asyncio
+import datetime
+import json
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import List
+
+import httpx
+
+from .scenarios import SCENARIOS, Context, Recorder
+from .server import Server, scrape, server_stats
+
+
+def percentiles(values: List[float]) -> dict:
+    if not values:
+        return {"p50": None, "p95": None, "p99": None, "max": None, "mean": None}
+    ordered = sorted(values)
+
+    def at(pct: float) -> float:
+        index = min(len(ordered) - 1, round(pct / 100 * (len(ordered) - 1)))
+        return round(ordered[index] * 1000, 3)
+
+    return {
+        "p50": at(50),
+        "p95": at(95),
+        "p99": at(99),
+        "max": round(ordered[-1] * 1000, 3),
+        "mean": round(statistics.fmean(ordered) * 1000, 3),
+    }
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+async def drive(scenario, client: httpx.AsyncClient, concurrency: int, until) -> None:
+    async def worker(index: int) -> None:
+        while time.perf_counter() < until():
+            try:
+                await scenario.step(client, index)
+            except Exception as e:
+                # Один неудачный шаг (401 при входе, битый JSON) не должен
+                # останавливать весь прогон
+                scenario.recorder.step_error(e)
+
+    await asyncio.gather(*(worker(index) for index in range(concurrency)))
+
+
+async def run(args) -> dict:
+    recorder = Recorder()
+    limits = httpx.Limits(
+        max_connections=args.concurrency, max_keepalive_connections=args.concurrency
+    )
+    async with Server(args.port, workers=args.workers) as server:
+        async with httpx.AsyncClient(
+            base_url=server.base_url, limits=limits, timeout=args.timeout
+        ) as client:
+            ctx = Context(client, args.seed)
+            scenario = SCENARIOS[args.scenario](ctx, recorder)
+            if args.scenario == "import":
+                scenario.rows = args.import_rows
+            try:
+                await ctx.setup(scenario.readers_needed(args.concurrency))
+
+                phase = {"end": float("inf")}
+                load = asyncio.create_task(
+                    drive(scenario, client, args.concurrency, lambda: phase["end"])
+                )
+                await asyncio.sleep(args.warmup)
+                before = await scrape(client)
+                recorder.enabled = True
+                measured_from = time.perf_counter()
+                phase["end"] = measured_from + args.duration
+                await load
+                elapsed = time.perf_counter() - measured_from
+                recorder.enabled = False
+                after = await scrape(client)
+            finally:
+                if not args.keep_accounts:
+                    await ctx.teardown()
+
+    all_samples = [value for values in recorder.samples.values() for value in values]
+    errors = (
+        recorder.transport_errors
+        + sum(recorder.step_errors.values())
+        + sum(
+            count
+            for statuses in recorder.statuses.values()
+            for status, count in statuses.items()
+            if status >= 500
+        )
+    )
+    return {
+        "scenario": args.scenario,
+        "started_at": datetime.datetime.now().isoformat(timespec="seconds"),
+        "commit": git_commit(),
+        "label": args.label,
+        "config": {
+            "concurrency": args.concurrency,
+            "duration_s": args.duration,
+            "warmup_s": args.warmup,
+            "workers": args.workers,
+            "seed": args.seed,
+        },
+        "requests": len(all_samples),
+        "errors": errors,
+        "step_errors": recorder.step_errors,
+        "rps": round(len(all_samples) / elapsed, 2) if elapsed else None,
+        "latency_ms": percentiles(all_samples),
+        "endpoints": {
+            endpoint: {
+                "requests": len(values),
+                "statuses": recorder.statuses.get(endpoint, {}),
+                "latency_ms": percentiles(values),
+            }
+            for endpoint, values in sorted(recorder.samples.items())
+        },
+        "server": server_stats(before, after),
+    }
+
+
+COMPARED = [
+    ("rps", ("rps",), True),
+    ("p50 ms", ("latency_ms", "p50"), False),
+    ("p95 ms", ("latency_ms", "p95"), False),
+    ("p99 ms", ("latency_ms", "p99"), False),
+    ("errors", ("errors",), False),
+    ("stmts/req", ("server", "db_statements_per_request"), False),
+    ("db ms/req", ("server", "db_time_per_request_ms"), False),
+    ("pool wait avg", ("server", "pool_wait_avg_ms"), False),
+    ("pool wait p95", ("server", "pool_wait_p95_ms"), False),
+    ("bcrypt avg ms", ("server", "bcrypt_avg_ms"), False),
+]
+
+
+def lookup(report: dict, path: tuple):
+    value = report
+    for key in path:
+        value = value.get(key) if isinstance(value, dict) else None
+    return value
+
+
+def compare(paths: List[str], threshold: float) -> int:
+    """
+    Таблица ключевых метрик с изменением относительно первого файла.
+
+    Код возврата 1, если RPS упал или p95/p99 выросли больше чем на
+    threshold процентов.
+    """
+    reports = [json.loads(Path(path).read_text()) for path in paths]
+    names = [
+        report.get("label") or Path(path).stem
+        for report, path in zip(reports, paths)
+    ]
+    base = reports[0]
+    width = max(14, *(len(name) for name in names)) + 2
+
+    print(f"{'':<14}" + "".join(f"{name:>{width}}" for name in names))
+    regressed = False
+    for title, path, higher_is_better in COMPARED:
+        base_value = lookup(base, path)
+        cells = []
+        for report in reports:
+            value = lookup(report, path)
+            cell = "-" if value is None else f"{value}"
+            if report is not base and value is not None and base_value:
+                change = (value - base_value) / base_value * 100
+                cell += f" ({change:+.1f}%)"
+                worse = -change if higher_is_better else change
+                if path[-1] in ("rps", "p95", "p99") and worse > threshold:
+                    regressed = True
+            cells.append(cell)
+        print(f"{title:<14}" + "".join(f"{cell:>{width}}" for cell in cells))
+    if any(report["scenario"] != base["scenario"] for report in reports):
+        print("\nВнимание: сравниваются разные сценарии")
+    return 1 if regressed else 0
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = commands.add_parser("run", help="прогнать сценарий")
+    run_parser.add_argument("--scenario", choices=list(SCENARIOS), required=True)
+    run_parser.add_argument("--concurrency", type=int, default=50)
+    run_parser.add_argument("--duration", type=float, default=30)
+    run_parser.add_argument("--warmup", type=float, default=5)
+    run_parser.add_argument("--workers", type=int, default=1)
+    run_parser.add_argument("--port", type=int, default=8200)
+    run_parser.add_argument("--timeout", type=float, default=30)
+    run_parser.add_argument("--seed", type=int, default=42)
+    run_parser.add_argument("--import-rows", type=int, default=1000)
+    run_parser.add_argument("--label", help="имя прогона в сравнении")
+    run_parser.add_argument(
+        "--keep-accounts",
+        action="store_true",
+        help="не удалять учетки прогона после него",
+    )
+    run_parser.add_argument("--out", help="куда сохранить JSON (иначе stdout)")
+
+    compare_parser = commands.add_parser("compare", help="сравнить прогоны")
+    compare_parser.add_argument("reports", nargs="+")
+    compare_parser.add_argument(
+        "--threshold",
+        type=float,
+        default=10,
+        help="допустимое ухудшение RPS/p95/p99 в процентах",
+    )
+
+    args = parser.parse_args()
+    if args.command == "compare":
+        return compare(args.reports, args.threshold)
+
+    report = asyncio.run(run(args))
+    text = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.out:
+        Path(args.out).parent.mkdir(parents=True, exist_ok=True)
+        Path(args.out).write_text(text)
+        print(
+            f"{report['scenario']}: {report['rps']} rps, "
+            f"p95 {report['latency_ms']['p95']} ms, "
+            f"{report['server']['db_statements_per_request']} stmts/req -> {args.out}"
+        )
+    else:
+        print(text)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,255 @@
+"""
+Выдача и возврат горячих книг: чтение-изменение-запись против CirculationService.
+
+Запуск из корня проекта:
+    python -m benchmarks.hot_checkout --concurrency 50 --duration 20 --hot 5
+
+read-modify-write - как было до CirculationService: SELECT читателя и книги,
+                    проверки в Python, UPDATE счетчиков готовыми значениями,
+                    INSERT выдачи (возврат так же);
+guarded           - CirculationService.issue/return_book: один запрос с
+                    условными UPDATE ... RETURNING в CTE.
+
+Каждый воркер в цикле выдает случайную из --hot книг и сразу ее возвращает,
+каждая операция - отдельная транзакция. Скрипт сам создает автора, книги
+(по --copies экземпляров) и читателей, а в конце удаляет их. В отчете
+операции в секунду, p50/p95, отказы и расхождение счетчиков: сколько
+экземпляров "потерялось" или "появилось" из-за гонок.
+"""
+
+import argparse
+import asyncio
+import datetime
+import random
+import statistics
+import time
+import uuid
+
+from sqlalchemy import delete, func, insert, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import sessionmaker
+
+from API_for_library.app.Issue.circulation import MAX_ISSUED_BOOKS, CirculationService
+from API_for_library.db.session import build_engine
+from API_for_library.models.authors import Authors
+from API_for_library.models.books import Books
+from API_for_library.models.issue import Issue
+from API_for_library.models.user import User
+from main import DB_URL
+
+
+async def legacy_issue(session: AsyncSession, book_id, user_id) -> uuid.UUID:
+    reader = (
+        await session.execute(select(User).where(User.id == user_id))
+    ).scalar_one()
+    if reader.books_count >= MAX_ISSUED_BOOKS:
+        raise ValueError("limit")
+    book = (
+        await session.execute(select(Books).where(Books.id == book_id))
+    ).scalar_one()
+    if book.counter <= 0:
+        raise ValueError("not available")
+    await session.execute(
+        update(Books).where(Books.id == book_id).values(counter=book.counter - 1)
+    )
+    await session.execute(
+        update(User)
+        .where(User.id == user_id)
+        .values(books_count=reader.books_count + 1)
+    )
+    today = datetime.date.today()
+    issue_id = uuid.uuid4()
+    await session.execute(
+        insert(Issue).values(
+            id=issue_id,
+            book_id=book_id,
+            user_id=user_id,
+            issue_date=today,
+            return_date=today + datetime.timedelta(days=14),
+            returned=False,
+        )
+    )
+    return issue_id
+
+
+async def legacy_return(session: AsyncSession, issue_id) -> None:
+    issue = (
+        await session.execute(select(Issue).where(Issue.id == issue_id))
+    ).scalar_one()
+    if issue.returned:
+        raise ValueError("already returned")
+    book = (
+        await session.execute(select(Books).where(Books.id == issue.book_id))
+    ).scalar_one()
+    reader = (
+        await session.execute(select(User).where(User.id == issue.user_id))
+    ).scalar_one()
+    await session.execute(
+        update(Issue).where(Issue.id == issue_id).values(returned=True)
+    )
+    await session.execute(
+        update(Books).where(Books.id == book.id).values(counter=book.counter + 1)
+    )
+    await session.execute(
+        update(User)
+        .where(User.id == reader.id)
+        .values(books_count=max(reader.books_count - 1, 0))
+    )
+
+
+async def guarded_issue(session: AsyncSession, book_id, user_id) -> uuid.UUID:
+    return (await CirculationService(session).issue(book_id, user_id, 14))["id"]
+
+
+async def guarded_return(session: AsyncSession, issue_id) -> None:
+    await CirculationService(session).return_book(issue_id)
+
+
+MODES = {
+    "read-modify-write": (legacy_issue, legacy_return),
+    "guarded": (guarded_issue, guarded_return),
+}
+
+
+async def prepare(session_maker, args) -> tuple:
+    prefix = uuid.uuid4().hex[:8]
+    async with session_maker() as session:
+        author = Authors(
+            name=f"bench-{prefix}", biography="-", birth_date=datetime.date(1900, 1, 1)
+        )
+        session.add(author)
+        await session.flush()
+        books = [
+            Books(
+                title=f"bench-{prefix}-{index}",
+                description="-",
+                genre="bench",
+                authors=author.name,
+                counter=args.copies,
+                author_id=author.id,
+                publication_date=datetime.date(2000, 1, 1),
+            )
+            for index in range(args.hot)
+        ]
+        readers = [
+            User(
+                email=f"bench-{prefix}-{index}@example.com",
+                username=f"bench-{prefix}-{index}",
+                password_hash=b"-",
+                role="reader",
+                books_count=0,
+            )
+            for index in range(args.concurrency)
+        ]
+        session.add_all([*books, *readers])
+        await session.commit()
+        return author.id, [book.id for book in books], [user.id for user in readers]
+
+
+async def counter_drift(session_maker, book_ids, copies: int) -> int:
+    """Сумма отклонений счетчиков от числа экземпляров минус активные выдачи"""
+    async with session_maker() as session:
+        counters = sum(
+            (
+                await session.execute(
+                    select(Books.counter).where(Books.id.in_(book_ids))
+                )
+            ).scalars()
+        )
+        active = (
+            await session.execute(
+                select(func.count())
+                .select_from(Issue)
+                .where(Issue.book_id.in_(book_ids), Issue.returned.is_not(True))
+            )
+        ).scalar_one()
+    return counters + active - copies * len(book_ids)
+
+
+async def run_mode(name: str, engine, args) -> dict:
+    session_maker = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    author_id, book_ids, reader_ids = await prepare(session_maker, args)
+    issue_op, return_op = MODES[name]
+    latencies = []
+    rejected = 0
+    errors = 0
+
+    async def transaction(op, *op_args):
+        async with session_maker() as session:
+            try:
+                result = await op(session, *op_args)
+                await session.commit()
+                return result
+            except Exception:
+                await session.rollback()
+                raise
+
+    async def worker(user_id, until: float) -> None:
+        nonlocal rejected, errors
+        while time.perf_counter() < until:
+            started = time.perf_counter()
+            try:
+                issue_id = await transaction(issue_op, random.choice(book_ids), user_id)
+                await transaction(return_op, issue_id)
+            except ValueError:
+                rejected += 1
+                continue
+            except Exception:
+                errors += 1
+                continue
+            latencies.append(time.perf_counter() - started)
+
+    until = time.perf_counter() + args.duration
+    started = time.perf_counter()
+    await asyncio.gather(*(worker(user_id, until) for user_id in reader_ids))
+    elapsed = time.perf_counter() - started
+    drift = await counter_drift(session_maker, book_ids, args.copies)
+
+    async with session_maker() as session:
+        await session.execute(delete(Issue).where(Issue.book_id.in_(book_ids)))
+        await session.execute(delete(Books).where(Books.id.in_(book_ids)))
+        await session.execute(delete(User).where(User.id.in_(reader_ids)))
+        await session.execute(delete(Authors).where(Authors.id == author_id))
+        await session.commit()
+
+    latencies.sort()
+    return {
+        "mode": name,
+        "ops": len(latencies),
+        "ops/s": round(len(latencies) / elapsed, 1),
+        "p50 ms": round(statistics.median(latencies) * 1000, 2) if latencies else None,
+        "p95 ms": (
+            round(latencies[int(len(latencies) * 0.95)] * 1000, 2)
+            if latencies
+            else None
+        ),
+        "rejected": rejected,
+        "errors": errors,
+        "drift": drift,
+    }
+
+
+async def main(args) -> None:
+    engine = build_engine(args.db_url)
+    rows = []
+    for name in args.modes:
+        rows.append(await run_mode(name, engine, args))
+    await engine.dispose()
+
+    header = list(rows[0])
+    print(" | ".join(f"{key:>17}" for key in header))
+    for row in rows:
+        print(" | ".join(f"{str(row[key]):>17}" for key in header))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--db-url", default=DB_URL)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--duration", type=float, default=20)
+    parser.add_argument("--hot", type=int, default=5, help="число горячих книг")
+    parser.add_argument("--copies", type=int, default=10, help="экземпляров книги")
+    parser.add_argument("--modes", nargs="+", choices=list(MODES), default=list(MODES))
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,336 @@
+import abc
+import asyncio
+import bisect
+import itertools
+import json
+import random
+import time
+import uuid
+from typing import Dict, List, Optional
+
+import httpx
+
+TOKEN_MAX_AGE = 120
+PASSWORD = "bench-password"
+
+
+class Recorder:
+    """Время ответов по эндпоинтам; пока enabled=False (прогрев), не пишет"""
+
+    def __init__(self) -> None:
+        self.enabled = False
+        self.samples: Dict[str, List[float]] = {}
+        self.statuses: Dict[str, Dict[int, int]] = {}
+        self.transport_errors = 0
+        self.step_errors: Dict[str, int] = {}
+
+    def step_error(self, error: Exception) -> None:
+        """Исключение в шаге сценария (например, не удался вход) - по типу"""
+        if self.enabled:
+            name = type(error).__name__
+            self.step_errors[name] = self.step_errors.get(name, 0) + 1
+
+    async def request(
+        self, client: httpx.AsyncClient, endpoint: str, method: str, url: str, **kw
+    ) -> Optional[httpx.Response]:
+        started = time.perf_counter()
+        try:
+            response = await client.request(method, url, **kw)
+        except httpx.HTTPError:
+            if self.enabled:
+                self.transport_errors += 1
+            return None
+        if self.enabled:
+            self.samples.setdefault(endpoint, []).append(time.perf_counter() - started)
+            statuses = self.statuses.setdefault(endpoint, {})
+            statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+        return response
+
+
+class Account:
+    def __init__(self, email: str, role: str) -> None:
+        self.email = email
+        self.role = role
+        self.id: Optional[str] = None
+        self.token: Optional[str] = None
+        self.token_at = 0.0
+
+    async def login(self, client: httpx.AsyncClient) -> None:
+        response = await client.post(
+            "/auth/token", json={"email": self.email, "password": PASSWORD}
+        )
+        response.raise_for_status()
+        self.token = response.json()["access_token"]
+        self.token_at = time.monotonic()
+
+    async def headers(self, client: httpx.AsyncClient) -> dict:
+        """Заголовок авторизации; токен живет 3 минуты, обновляется заранее"""
+        if self.token is None or time.monotonic() - self.token_at > TOKEN_MAX_AGE:
+            await self.login(client)
+        return {"Authorization": f"Bearer {self.token}"}
+
+
+class Context:
+    """
+    Общие данные прогона: учетки и выборка каталога.
+
+    Учетки создаются через API с уникальным префиксом на каждый прогон.
+    Каталог читается через GET /books/?fields=..., его нужно заранее
+    заполнить (scripts/seed.py).
+    """
+
+    def __init__(self, client: httpx.AsyncClient, seed: int) -> None:
+        self.client = client
+        self.rng = random.Random(seed)
+        self.run_id = uuid.uuid4().hex[:8]
+        self.admin: Optional[Account] = None
+        self.readers: List[Account] = []
+        self.book_ids: List[str] = []
+        self.author_ids: List[str] = []
+        self.words: List[str] = []
+        self._popularity: List[float] = []
+
+    async def create_account(self, role: str, index: int) -> Account:
+        account = Account(f"bench-{self.run_id}-{role}-{index}@example.com", role)
+        response = await self.client.post(
+            "/user/",
+            json={
+                "username": f"bench-{self.run_id}-{role}-{index}",
+                "email": account.email,
+                "role": role,
+                "password": PASSWORD,
+            },
+        )
+        response.raise_for_status()
+        account.id = response.json()["id"]
+        return account
+
+    async def setup(self, readers: int, max_books: int = 2000) -> None:
+        self.admin = await self.create_account("admin", 0)
+        await self.admin.login(self.client)
+        self.readers = [
+            await self.create_account("reader", index) for index in range(readers)
+        ]
+
+        headers = await self.admin.headers(self.client)
+        cursor = None
+        while len(self.book_ids) < max_books:
+            params = {"limit": 500, "fields": "id,author_id,title"}
+            if cursor:
+                params["cursor"] = cursor
+            response = await self.client.get("/books/", params=params, headers=headers)
+            response.raise_for_status()
+            page = response.json()
+            for item in page["items"]:
+                self.book_ids.append(item["id"])
+                self.author_ids.append(item["author_id"])
+                self.words.extend(
+                    word for word in item["title"].lower().split() if len(word) > 3
+                )
+            cursor = page["next_cursor"]
+            if not cursor:
+                break
+        if not self.book_ids:
+            raise SystemExit("Каталог пуст, сначала запустите scripts/seed.py")
+        self.author_ids = list(dict.fromkeys(self.author_ids))
+        self.words = list(dict.fromkeys(self.words)) or ["book"]
+        # Популярность книг по Ципфу: несколько горячих книг и длинный хвост
+        self._popularity = list(
+            itertools.accumulate(
+                1 / rank**1.1 for rank in range(1, len(self.book_ids) + 1)
+            )
+        )
+
+    async def teardown(self, parallel: int = 10) -> None:
+        """
+        Удаление учеток прогона (DELETE /user/ от имени каждой).
+
+        Ошибки не прерывают удаление остальных: оставшиеся учетки не мешают
+        следующим прогонам, у них свой run_id.
+        """
+        limit = asyncio.Semaphore(parallel)
+
+        async def delete(account: Account) -> None:
+            async with limit:
+                try:
+                    headers = await account.headers(self.client)
+                    await self.client.delete("/user/", headers=headers)
+                except httpx.HTTPError:
+                    pass
+
+        accounts = [*self.readers, *([self.admin] if self.admin else [])]
+        await asyncio.gather(*(delete(account) for account in accounts))
+
+    def popular_book(self, top: Optional[int] = None) -> str:
+        weights = self._popularity[:top] if top else self._popularity
+        index = bisect.bisect(weights, self.rng.random() * weights[-1])
+        return self.book_ids[min(index, len(weights) - 1)]
+
+
+class Scenario(abc.ABC):
+    name = ""
+    description = ""
+
+    def __init__(self, ctx: Context, recorder: Recorder) -> None:
+        self.ctx = ctx
+        self.recorder = recorder
+
+    def readers_needed(self, concurrency: int) -> int:
+        return 1
+
+    @abc.abstractmethod
+    async def step(self, client: httpx.AsyncClient, worker: int) -> None:
+        """Одна итерация воркера: несколько запросов через recorder"""
+
+
+class Browse(Scenario):
+    name = "browse"
+    description = "чтение каталога: списки, карточки книг, поиск, авторы"
+
+    def __init__(self, ctx: Context, recorder: Recorder) -> None:
+        super().__init__(ctx, recorder)
+        self.cursors: Dict[int, Optional[str]] = {}
+
+    def readers_needed(self, concurrency: int) -> int:
+        return min(concurrency, 20)
+
+    async def step(self, client: httpx.AsyncClient, worker: int) -> None:
+        ctx = self.ctx
+        reader = ctx.readers[worker % len(ctx.readers)]
+        headers = await reader.headers(client)
+        choice = ctx.rng.random()
+        if choice < 0.45:
+            params = {"limit": 50}
+            cursor = self.cursors.get(worker)
+            if cursor and ctx.rng.random() < 0.5:
+                params["cursor"] = cursor
+            response = await self.recorder.request(
+                client, "GET /books/", "GET", "/books/", params=params, headers=headers
+            )
+            if response is not None and response.status_code == 200:
+                self.cursors[worker] = response.json()["next_cursor"]
+        elif choice < 0.75:
+            await self.recorder.request(
+                client,
+                "GET /books/{book_id}",
+                "GET",
+                f"/books/{ctx.popular_book()}",
+                headers=headers,
+            )
+        elif choice < 0.9:
+            await self.recorder.request(
+                client,
+                "GET /books/search",
+                "GET",
+                "/books/search",
+                params={"q": ctx.rng.choice(ctx.words), "limit": 20},
+                headers=headers,
+            )
+        else:
+            await self.recorder.request(
+                client,
+                "GET /author/author_id",
+                "GET",
+                "/author/author_id",
+                params={"author_id": ctx.rng.choice(ctx.author_ids)},
+                headers=headers,
+            )
+
+
+class CheckoutStorm(Scenario):
+    name = "checkout"
+    description = "выдача и сразу возврат горячих книг, конкуренция за счетчики"
+
+    HOT_BOOKS = 50
+
+    def readers_needed(self, concurrency: int) -> int:
+        return concurrency
+
+    async def step(self, client: httpx.AsyncClient, worker: int) -> None:
+        ctx = self.ctx
+        reader = ctx.readers[worker % len(ctx.readers)]
+        headers = await reader.headers(client)
+        response = await self.recorder.request(
+            client,
+            "POST /issues/{book_id}",
+            "POST",
+            f"/issues/{ctx.popular_book(self.HOT_BOOKS)}",
+            params={"user_id": reader.id},
+            headers=headers,
+        )
+        if response is None or response.status_code != 200:
+            return
+        await self.recorder.request(
+            client,
+            "POST /issues/return/{issue_id}",
+            "POST",
+            f"/issues/return/{response.json()['id']}",
+            headers=headers,
+        )
+
+
+class LoginBurst(Scenario):
+    name = "login"
+    description = "вход и запрос профиля (bcrypt + проверка JWT)"
+
+    def readers_needed(self, concurrency: int) -> int:
+        return min(concurrency, 50)
+
+    async def step(self, client: httpx.AsyncClient, worker: int) -> None:
+        reader = self.ctx.readers[worker % len(self.ctx.readers)]
+        response = await self.recorder.request(
+            client,
+            "POST /auth/token",
+            "POST",
+            "/auth/token",
+            json={"email": reader.email, "password": PASSWORD},
+        )
+        if response is None or response.status_code != 200:
+            return
+        await self.recorder.request(
+            client,
+            "GET /user/",
+            "GET",
+            "/user/",
+            headers={"Authorization": f"Bearer {response.json()['access_token']}"},
+        )
+
+
+class AdminImport(Scenario):
+    name = "import"
+    description = "импорт каталога NDJSON-файлами администратором"
+
+    rows = 1000
+
+    async def step(self, client: httpx.AsyncClient, worker: int) -> None:
+        ctx = self.ctx
+        headers = await ctx.admin.headers(client)
+        body = "\n".join(
+            json.dumps(
+                {
+                    "title": f"Bench book {ctx.run_id} {worker} {index}",
+                    "description": "Imported by benchmark",
+                    "publication_date": "2020-01-01",
+                    "authors": "Bench Author",
+                    "counter": 3,
+                    "genre": "bench",
+                    "author_id": ctx.rng.choice(ctx.author_ids),
+                }
+            )
+            for index in range(self.rows)
+        )
+        await self.recorder.request(
+            client,
+            "POST /books/import",
+            "POST",
+            "/books/import",
+            content=body.encode(),
+            headers={**headers, "Content-Type": "application/x-ndjson"},
+            timeout=120,
+        )
+
+
+SCENARIOS = {
+    scenario.name: scenario
+    for scenario in (Browse, CheckoutStorm, LoginBurst, AdminImport)
+}
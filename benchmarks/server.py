@@ -0,0 +1,163 @@
+import asyncio
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+import httpx
+from prometheus_client.parser import text_string_to_metric_families
+
+Sample = Tuple[str, Dict[str, str], float]
+
+
+class Server:
+    """
+    Приложение в отдельном процессе uvicorn (create_api через factory).
+
+    С несколькими воркерами задается PROMETHEUS_MULTIPROC_DIR, чтобы
+    /metrics отдавал сумму по всем процессам.
+    """
+
+    def __init__(
+        self, port: int, workers: int = 1, env: Optional[dict] = None
+    ) -> None:
+        self.port = port
+        self.workers = workers
+        self.env = env or {}
+        self.base_url = f"http://127.0.0.1:{port}"
+        self.process: Optional[subprocess.Popen] = None
+        self._metrics_dir: Optional[tempfile.TemporaryDirectory] = None
+
+    async def __aenter__(self) -> "Server":
+        env = {**os.environ, **self.env}
+        if self.workers > 1:
+            self._metrics_dir = tempfile.TemporaryDirectory(prefix="bench-metrics-")
+            env["PROMETHEUS_MULTIPROC_DIR"] = self._metrics_dir.name
+        command = [
+            sys.executable,
+            "-m",
+            "uvicorn",
+            "API_for_library.api:create_api",
+            "--factory",
+            "--port",
+            str(self.port),
+            "--workers",
+            str(self.workers),
+            "--log-level",
+            "warning",
+            "--no-access-log",
+        ]
+        self.process = subprocess.Popen(command, env=env)
+        await self.wait_ready()
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        if self.process is not None:
+            self.process.terminate()
+            self.process.wait()
+        if self._metrics_dir is not None:
+            self._metrics_dir.cleanup()
+
+    async def wait_ready(self, timeout: float = 60) -> None:
+        deadline = time.perf_counter() + timeout
+        while time.perf_counter() < deadline:
+            if self.process.poll() is not None:
+                code = self.process.returncode
+                raise RuntimeError(f"uvicorn завершился с кодом {code}")
+            try:
+                _, writer = await asyncio.open_connection("127.0.0.1", self.port)
+                writer.close()
+                await writer.wait_closed()
+                return
+            except OSError:
+                await asyncio.sleep(0.05)
+        raise TimeoutError("uvicorn не поднялся")
+
+
+async def scrape(client: httpx.AsyncClient) -> List[Sample]:
+    """Все сэмплы /metrics"""
+    response = await client.get("/metrics")
+    response.raise_for_status()
+    return [
+        (sample.name, sample.labels, sample.value)
+        for family in text_string_to_metric_families(response.text)
+        for sample in family.samples
+    ]
+
+
+def total(
+    samples: Iterable[Sample],
+    name: str,
+    where: Optional[Callable[[Dict[str, str]], bool]] = None,
+) -> float:
+    return sum(
+        value
+        for sample_name, labels, value in samples
+        if sample_name == name and (where is None or where(labels))
+    )
+
+
+def delta(before, after, name, where=None) -> float:
+    return total(after, name, where) - total(before, name, where)
+
+
+def histogram_quantile(before, after, name: str, quantile: float) -> Optional[float]:
+    """Верхняя граница бакета, в который попал квантиль (по приросту)"""
+    buckets: Dict[float, float] = {}
+    for samples, sign in ((after, 1), (before, -1)):
+        for sample_name, labels, value in samples:
+            if sample_name == f"{name}_bucket":
+                bound = float(labels["le"])
+                buckets[bound] = buckets.get(bound, 0.0) + sign * value
+    if not buckets:
+        return None
+    bounds = sorted(buckets)
+    count = buckets[bounds[-1]]
+    if count <= 0:
+        return None
+    for bound in bounds:
+        if buckets[bound] >= quantile * count:
+            return bound
+    return bounds[-1]
+
+
+def server_stats(before: List[Sample], after: List[Sample]) -> dict:
+    """
+    Серверная сторона прогона по приросту метрик.
+
+    Запросы к самому /metrics не считаются.
+    """
+    requests = delta(
+        before,
+        after,
+        "http_request_duration_seconds_count",
+        lambda labels: labels.get("route") != "/metrics",
+    )
+    statements = delta(before, after, "db_statement_duration_seconds_count")
+    db_time = delta(before, after, "db_statement_duration_seconds_sum")
+    checkouts = delta(before, after, "db_pool_checkout_wait_seconds_count")
+    wait_time = delta(before, after, "db_pool_checkout_wait_seconds_sum")
+    wait_p95 = histogram_quantile(before, after, "db_pool_checkout_wait_seconds", 0.95)
+    hashes = delta(before, after, "password_hash_duration_seconds_count")
+    hash_time = delta(before, after, "password_hash_duration_seconds_sum")
+    return {
+        "requests": int(requests),
+        "db_statements": int(statements),
+        "db_statements_per_request": round(statements / requests, 2)
+        if requests
+        else None,
+        "db_time_per_request_ms": round(db_time * 1000 / requests, 3)
+        if requests
+        else None,
+        "pool_checkouts": int(checkouts),
+        "pool_wait_avg_ms": round(wait_time * 1000 / checkouts, 3)
+        if checkouts
+        else None,
+        "pool_wait_p95_ms": round(wait_p95 * 1000, 3)
+        if wait_p95 is not None
+        else None,
+        "pool_timeouts": int(delta(before, after, "db_pool_checkout_timeouts_total")),
+        "bcrypt_avg_ms": round(hash_time * 1000 / hashes, 3) if hashes else None,
+    }
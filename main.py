@@ -1,4 +1,6 @@
 import os
+import tempfile
+
 import uvicorn
 from dotenv import load_dotenv
 
@@ -7,14 +9,105 @@ load_dotenv(override=True)
 DEBUG: bool = os.environ.get("DEBUG", "False") == "True"
 API_HOST: str = os.environ.get("APP_HOST", "0.0.0.0")
 API_PORT: int = int(os.environ.get("APP_PORT", "8000"))
+API_MODE: str = os.environ.get("APP_MODE", "dev")
+API_WORKERS: int = int(os.environ.get("APP_WORKERS", str(os.cpu_count() or 1)))
+API_LOOP: str = os.environ.get("APP_LOOP", "auto")
+API_HTTP: str = os.environ.get("APP_HTTP", "auto")
+API_KEEPALIVE: int = int(os.environ.get("APP_KEEPALIVE", "5"))
+API_BACKLOG: int = int(os.environ.get("APP_BACKLOG", "2048"))
+API_GRACEFUL_TIMEOUT: int = int(os.environ.get("APP_GRACEFUL_TIMEOUT", "30"))
 DB_URL: str = os.environ.get("DB_URL")
+DB_REPLICA_URL: str = os.environ.get("DB_REPLICA_URL", "")
 JWT_SECRET_KEY: str = os.environ.get("JWT_SECRET_KEY")
 
-if __name__ == "__main__":
-    uvicorn.run(
-        app="API_for_library.api:api",
-        host=API_HOST,
-        port=API_PORT,
-        reload=True,
-        workers=1,
+DB_ECHO: bool = os.environ.get("DB_ECHO", "False") == "True"
+DB_POOL_SIZE: int = int(os.environ.get("DB_POOL_SIZE", "10"))
+DB_MAX_OVERFLOW: int = int(os.environ.get("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT: float = float(os.environ.get("DB_POOL_TIMEOUT", "30"))
+DB_POOL_PRE_PING: bool = os.environ.get("DB_POOL_PRE_PING", "True") == "True"
+DB_POOL_RECYCLE: int = int(os.environ.get("DB_POOL_RECYCLE", "1800"))
+DB_STATEMENT_CACHE_SIZE: int = int(os.environ.get("DB_STATEMENT_CACHE_SIZE", "100"))
+DB_PGBOUNCER: bool = os.environ.get("DB_PGBOUNCER", "False") == "True"
+DB_WARMUP_CONNECTIONS: int = int(
+    os.environ.get("DB_WARMUP_CONNECTIONS", str(min(DB_POOL_SIZE, 5)))
+)
+
+SLOW_QUERY_THRESHOLD_MS: float = float(os.environ.get("SLOW_QUERY_THRESHOLD_MS", "0"))
+SLOW_QUERY_EXPLAIN_SAMPLE: float = float(
+    os.environ.get("SLOW_QUERY_EXPLAIN_SAMPLE", "0")
+)
+SLOW_QUERY_LOG_FILE: str = os.environ.get(
+    "SLOW_QUERY_LOG_FILE", "logs/slow_queries.log"
+)
+SLOW_QUERY_LOG_MAX_BYTES: int = int(
+    os.environ.get("SLOW_QUERY_LOG_MAX_BYTES", str(10 * 1024 * 1024))
+)
+SLOW_QUERY_LOG_BACKUPS: int = int(os.environ.get("SLOW_QUERY_LOG_BACKUPS", "5"))
+
+PASSWORD_HASHER_MODE: str = os.environ.get("PASSWORD_HASHER_MODE", "thread")
+PASSWORD_HASHER_WORKERS: int = int(os.environ.get("PASSWORD_HASHER_WORKERS", "4"))
+
+PRINCIPAL_CACHE_TTL: float = float(os.environ.get("PRINCIPAL_CACHE_TTL", "30"))
+PRINCIPAL_CACHE_SIZE: int = int(os.environ.get("PRINCIPAL_CACHE_SIZE", "10000"))
+CATALOG_CACHE_TTL: float = float(os.environ.get("CATALOG_CACHE_TTL", "60"))
+CATALOG_CACHE_SIZE: int = int(os.environ.get("CATALOG_CACHE_SIZE", "10000"))
+
+AUDIT_BATCH_SIZE: int = int(os.environ.get("AUDIT_BATCH_SIZE", "500"))
+AUDIT_FLUSH_INTERVAL: float = float(os.environ.get("AUDIT_FLUSH_INTERVAL", "1.0"))
+AUDIT_QUEUE_SIZE: int = int(os.environ.get("AUDIT_QUEUE_SIZE", "10000"))
+
+IMPORT_CHUNK_SIZE: int = int(os.environ.get("IMPORT_CHUNK_SIZE", "5000"))
+BULK_CHUNK_SIZE: int = int(os.environ.get("BULK_CHUNK_SIZE", "1000"))
+
+
+def prepare_metrics_dir() -> str:
+    """
+    Общий каталог метрик prometheus_client для нескольких воркеров.
+
+    Без него /metrics показывает только тот воркер, который ответил. Каталог
+    задается до запуска воркеров (они наследуют окружение) и очищается от
+    файлов прошлого запуска, иначе счетчики продолжат старые значения.
+    """
+    directory = os.environ.get("PROMETHEUS_MULTIPROC_DIR") or os.path.join(
+        tempfile.gettempdir(), f"library-metrics-{API_PORT}"
     )
+    os.makedirs(directory, exist_ok=True)
+    if not os.access(directory, os.W_OK):
+        raise SystemExit(f"PROMETHEUS_MULTIPROC_DIR={directory} недоступен для записи")
+    for name in os.listdir(directory):
+        if name.endswith(".db"):
+            os.remove(os.path.join(directory, name))
+    os.environ["PROMETHEUS_MULTIPROC_DIR"] = directory
+    return directory
+
+
+if __name__ == "__main__":
+    if API_MODE == "prod":
+        if API_WORKERS > 1:
+            prepare_metrics_dir()
+        # loop/http="auto" берут uvloop и httptools, если они установлены.
+        # При остановке uvicorn ждет текущие запросы до APP_GRACEFUL_TIMEOUT,
+        # затем lifespan дописывает очередь аудита.
+        uvicorn.run(
+            app="API_for_library.api:create_api",
+            factory=True,
+            host=API_HOST,
+            port=API_PORT,
+            workers=API_WORKERS,
+            loop=API_LOOP,
+            http=API_HTTP,
+            timeout_keep_alive=API_KEEPALIVE,
+            backlog=API_BACKLOG,
+            timeout_graceful_shutdown=API_GRACEFUL_TIMEOUT,
+            proxy_headers=True,
+            access_log=DEBUG,
+        )
+    else:
+        uvicorn.run(
+            app="API_for_library.api:create_api",
+            factory=True,
+            host=API_HOST,
+            port=API_PORT,
+            reload=True,
+            workers=1,
+        )
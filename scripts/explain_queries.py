@@ -0,0 +1,123 @@
+"""
+EXPLAIN для запросов, которые делают роутеры.
+
+Запуск из корня проекта:
+    python -m scripts.explain_queries            # только план
+    python -m scripts.explain_queries --analyze  # EXPLAIN (ANALYZE, BUFFERS)
+
+Для подстановки в запросы берутся реальные id из базы, поэтому имеет смысл
+гонять скрипт на базе с данными (см. scripts/seed.py).
+"""
+
+import argparse
+import asyncio
+import datetime
+import uuid
+
+from sqlalchemy import select, text, tuple_, literal, func
+from sqlalchemy.dialects import postgresql
+
+from API_for_library.db.session import dispose_engine, init_engine
+from API_for_library.models.authors import Authors
+from API_for_library.models.books import Books, SEARCH_CONFIG
+from API_for_library.models.issue import Issue
+from API_for_library.models.logs import Logs
+from API_for_library.models.user import User
+
+
+async def sample_ids(conn) -> dict:
+    """Любые существующие id, чтобы планы строились на реальных значениях"""
+    ids = {}
+    for name, model in (
+        ("book", Books),
+        ("author", Authors),
+        ("user", User),
+        ("issue", Issue),
+    ):
+        value = (await conn.execute(select(model.id).limit(1))).scalar()
+        ids[name] = value or uuid.uuid4()
+    book = (await conn.execute(select(Books.created_at, Books.id).limit(1))).first()
+    ids["cursor"] = tuple(book) if book else (datetime.datetime.now(), uuid.uuid4())
+    return ids
+
+
+def router_queries(ids: dict) -> dict:
+    """Запросы роутеров, по одному на сценарий"""
+    week_ago = datetime.date.today() - datetime.timedelta(days=7)
+    ts_query = func.websearch_to_tsquery(
+        text(f"'{SEARCH_CONFIG}'::regconfig"), "war and peace"
+    )
+    return {
+        "books: list first page": select(Books)
+        .order_by(Books.created_at, Books.id)
+        .limit(51),
+        "books: list next page": select(Books)
+        .filter(
+            tuple_(Books.created_at, Books.id)
+            > tuple_(
+                literal(ids["cursor"][0], Books.created_at.type),
+                literal(ids["cursor"][1], Books.id.type),
+            )
+        )
+        .order_by(Books.created_at, Books.id)
+        .limit(51),
+        "books: get by id": select(Books).filter(Books.id == ids["book"]),
+        "books: search": select(Books)
+        .where(Books.search_vector.op("@@")(ts_query))
+        .order_by(func.ts_rank_cd(Books.search_vector, ts_query).desc(), Books.id)
+        .limit(21),
+        "books: by author (cascade)": select(Books.id).filter(
+            Books.author_id == ids["author"]
+        ),
+        "author: get by id": select(Authors).filter(Authors.id == ids["author"]),
+        "user: get by id (auth)": select(User).filter(User.id == ids["user"]),
+        "user: get by email (login)": select(User).filter(
+            User.email == "reader@example.com"
+        ),
+        "user: list readers": select(User).filter(User.role != "admin"),
+        "issues: active by user": select(Issue).filter(
+            Issue.user_id == ids["user"], Issue.returned.is_not(True)
+        ),
+        "issues: by book (cascade)": select(Issue.id).filter(
+            Issue.book_id == ids["book"]
+        ),
+        "issues: get by id (return)": select(Issue).filter(Issue.id == ids["issue"]),
+        "logs: event type in time range": select(Logs)
+        .filter(Logs.event_type == "ISSUE", Logs.timestamp >= week_ago)
+        .order_by(Logs.timestamp),
+        "logs: time range": select(Logs).filter(Logs.timestamp >= week_ago),
+    }
+
+
+def compile_query(query) -> str:
+    return str(
+        query.compile(
+            dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True}
+        )
+    )
+
+
+async def main(analyze: bool) -> None:
+    options = "(ANALYZE, BUFFERS)" if analyze else ""
+    engine = init_engine()
+    async with engine.connect() as conn:
+        ids = await sample_ids(conn)
+        for name, query in router_queries(ids).items():
+            sql = compile_query(query)
+            result = await conn.exec_driver_sql(f"EXPLAIN {options} {sql}")
+            plan = "\n".join(row[0] for row in result)
+            print(f"=== {name}\n{sql}\n\n{plan}\n")
+            if analyze:
+                await conn.rollback()
+    await dispose_engine()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--analyze",
+        action="store_true",
+        help="выполнить запросы (EXPLAIN ANALYZE, BUFFERS)",
+    )
+    args = parser.parse_args()
+    asyncio.run(main(args.analyze))
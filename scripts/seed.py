@@ -0,0 +1,344 @@
+"""
+Заполнение базы реалистичным объемом данных для нагрузочных прогонов.
+
+Запуск из корня проекта (схема должна быть накачена: alembic upgrade head):
+    python -m scripts.seed                       # полный объем, см. ниже
+    python -m scripts.seed --scale 0.01          # 1% объема для разработки
+    python -m scripts.seed --truncate --seed 7   # очистить и залить заново
+
+По умолчанию: 100k авторов, 1M книг, 500k пользователей, 3M выдач,
+20M записей логов. Данные детерминированы: один и тот же --seed и --as-of
+дают те же строки и те же id. Популярность книг и продуктивность авторов
+распределены по Ципфу, поэтому есть горячие книги и длинный хвост.
+
+Строки пишутся через COPY (DatabaseRepository.copy) пачками, по одной
+транзакции на таблицу. У всех пользователей один пароль (--password), хэш
+bcrypt считается один раз; логины вида reader1@seed.example.com и
+admin0@seed.example.com (каждый тысячный - админ).
+
+Счетчики согласованы: Books.counter - свободные экземпляры с учетом
+активных выдач, User.books_count - число активных выдач (не больше
+MAX_ISSUED_BOOKS).
+"""
+
+import argparse
+import asyncio
+import datetime
+import hashlib
+import itertools
+import math
+import random
+import time
+import uuid
+from typing import Dict, Iterable, Iterator, List, Tuple
+
+import bcrypt
+from sqlalchemy import text
+
+from API_for_library.app.Issue.circulation import MAX_ISSUED_BOOKS
+from API_for_library.db.repository import DatabaseRepository
+from API_for_library.db.session import async_session_maker, dispose_engine, init_engine
+from API_for_library.models.authors import Authors
+from API_for_library.models.books import Books
+from API_for_library.models.issue import Issue
+from API_for_library.models.logs import Logs
+from API_for_library.models.user import User
+
+WORDS = (
+    "war peace night river shadow garden city winter summer stone fire "
+    "silver golden house road sea island mountain forest star moon sun "
+    "secret last first lost hidden dark bright silent broken empty long "
+    "short cold warm old young wild quiet distant northern southern "
+    "journey story letter song dream memory promise return silence crown "
+    "kingdom empire heart soul mind voice king queen prince daughter son "
+    "brother sister mother father friend stranger hunter doctor captain "
+    "teacher thief witch dragon ghost wolf raven fox horse bird glass iron "
+    "paper clock mirror window door bridge tower castle village harbor"
+).split()
+FIRST_NAMES = (
+    "Anna Boris Clara Dmitry Elena Fedor Galina Igor Irina Konstantin Lev "
+    "Maria Nikolai Olga Pavel Sofia Timur Vera Yuri Zoya Alexander Ekaterina "
+    "Mikhail Natalia Sergey Tatiana Viktor Daria Andrei Polina"
+).split()
+LAST_NAMES = (
+    "Ivanov Petrov Sidorov Smirnov Kuznetsov Popov Volkov Sokolov Lebedev "
+    "Kozlov Novikov Morozov Pavlov Orlov Egorov Belov Tarasov Zaitsev Frolov "
+    "Komarov Gusev Titov Kiselev Makarov Nikitin Zakharov Stepanov Romanov"
+).split()
+GENRES = (
+    "novel",
+    "fantasy",
+    "detective",
+    "science fiction",
+    "poetry",
+    "history",
+    "biography",
+    "children",
+    "horror",
+    "romance",
+)
+LOG_EVENTS = (
+    ("ISSUE", 35),
+    ("RETURN", 33),
+    ("NEW USER", 10),
+    ("CREATE", 10),
+    ("UPDATE", 8),
+    ("DELETE", 2),
+    ("GET ALL USER", 2),
+)
+
+
+def make_id(seed: int, kind: str, index: int) -> uuid.UUID:
+    """Детерминированный id строки: на него ссылаются другие таблицы"""
+    digest = hashlib.blake2b(f"{seed}:{kind}:{index}".encode(), digest_size=16)
+    return uuid.UUID(bytes=digest.digest(), version=4)
+
+
+def random_id(rng: random.Random) -> uuid.UUID:
+    return uuid.UUID(int=rng.getrandbits(128), version=4)
+
+
+class Zipf:
+    """
+    Выбор индекса 0..n-1 с вероятностью ~ 1/rank.
+
+    Ранг берется обратной функцией распределения (n ** u), а ранги
+    перемешаны умножением на взаимно простое число, чтобы популярные
+    записи не были просто первыми по порядку.
+    """
+
+    def __init__(self, n: int) -> None:
+        self.n = n
+        self.step = 2654435761
+        while math.gcd(self.step, n) != 1:
+            self.step += 2
+
+    def __call__(self, rng: random.Random) -> int:
+        rank = min(int(self.n ** rng.random()), self.n) - 1
+        return rank * self.step % self.n
+
+
+def batched(rows: Iterable[dict], size: int) -> Iterator[List[dict]]:
+    batch: List[dict] = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+class Seeder:
+    def __init__(self, args) -> None:
+        self.seed = args.seed
+        self.as_of: datetime.date = args.as_of
+        self.now = datetime.datetime.combine(self.as_of, datetime.time(12))
+        self.authors = max(1, int(args.authors * args.scale))
+        self.books = max(1, int(args.books * args.scale))
+        self.users = max(1, int(args.users * args.scale))
+        self.issues = int(args.issues * args.scale)
+        self.logs = int(args.logs * args.scale)
+        self.batch_size = args.batch_size
+        self.password_hash = bcrypt.hashpw(args.password.encode(), bcrypt.gensalt())
+        self.book_popularity = Zipf(self.books)
+        self.author_output = Zipf(self.authors)
+        self.active: List[Tuple[int, int, datetime.date]] = []
+        self.active_by_book: Dict[int, int] = {}
+        self.active_by_user: Dict[int, int] = {}
+
+    def rng(self, table: str) -> random.Random:
+        """Свой генератор на таблицу: объем одной не сдвигает другие"""
+        return random.Random(f"{self.seed}:{table}")
+
+    def copies(self, book: int) -> int:
+        return 1 + ((book + self.seed) * 0x9E3779B1 >> 11) % 10
+
+    def plan_active_issues(self) -> None:
+        """
+        Активные выдачи считаются заранее: от них зависят Books.counter
+        и User.books_count, которые пишутся раньше самих выдач.
+        """
+        rng = self.rng("active")
+        for user in range(self.users):
+            if rng.random() >= 0.3:
+                continue
+            wanted = rng.choices(range(1, MAX_ISSUED_BOOKS + 1), (40, 25, 15, 12, 8))[0]
+            for _ in range(wanted):
+                book = self.book_popularity(rng)
+                if self.active_by_book.get(book, 0) >= self.copies(book):
+                    continue
+                self.active_by_book[book] = self.active_by_book.get(book, 0) + 1
+                self.active_by_user[user] = self.active_by_user.get(user, 0) + 1
+                issued = self.as_of - datetime.timedelta(days=rng.randrange(14))
+                self.active.append((user, book, issued))
+                if self.active_by_user[user] >= MAX_ISSUED_BOOKS:
+                    break
+
+    def past_datetime(self, rng: random.Random, days: int) -> datetime.datetime:
+        return self.now - datetime.timedelta(seconds=rng.randrange(days * 86400))
+
+    def author_rows(self) -> Iterator[dict]:
+        rng = self.rng("authors")
+        for index in range(self.authors):
+            created_at = self.past_datetime(rng, 5 * 365)
+            yield {
+                "id": make_id(self.seed, "author", index),
+                "name": self.author_name(index),
+                "biography": " ".join(rng.choices(WORDS, k=rng.randint(8, 30))),
+                "birth_date": datetime.date(
+                    rng.randint(1800, 2000), rng.randint(1, 12), rng.randint(1, 28)
+                ),
+                "created_at": created_at,
+                "updated_at": created_at,
+            }
+
+    def author_name(self, author: int) -> str:
+        rng = random.Random(f"{self.seed}:author-name:{author}")
+        return f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}"
+
+    def book_rows(self) -> Iterator[dict]:
+        rng = self.rng("books")
+        for index in range(self.books):
+            author = self.author_output(rng)
+            created_at = self.past_datetime(rng, 5 * 365)
+            title = " ".join(rng.choices(WORDS, k=rng.randint(2, 5))).capitalize()
+            yield {
+                "id": make_id(self.seed, "book", index),
+                "title": title,
+                "description": " ".join(rng.choices(WORDS, k=rng.randint(15, 60))),
+                "publication_date": datetime.date(
+                    rng.randint(1850, self.as_of.year), rng.randint(1, 12), 1
+                ),
+                "authors": self.author_name(author),
+                "counter": self.copies(index) - self.active_by_book.get(index, 0),
+                "genre": rng.choice(GENRES),
+                "author_id": make_id(self.seed, "author", author),
+                "created_at": created_at,
+                "updated_at": created_at,
+            }
+
+    def user_rows(self) -> Iterator[dict]:
+        rng = self.rng("users")
+        for index in range(self.users):
+            role = "admin" if index % 1000 == 0 else "reader"
+            created_at = self.past_datetime(rng, 3 * 365)
+            yield {
+                "id": make_id(self.seed, "user", index),
+                "email": f"{role}{index}@seed.example.com",
+                "username": f"{role}{index}",
+                "password_hash": self.password_hash,
+                "role": role,
+                "books_count": self.active_by_user.get(index, 0),
+                "created_at": created_at,
+                "updated_at": created_at,
+            }
+
+    def issue_rows(self) -> Iterator[dict]:
+        rng = self.rng("issues")
+        for user, book, issued in self.active:
+            yield self.issue_row(rng, user, book, issued, returned=False)
+        for _ in range(max(0, self.issues - len(self.active))):
+            user = rng.randrange(self.users)
+            book = self.book_popularity(rng)
+            issued = self.as_of - datetime.timedelta(days=rng.randint(15, 3 * 365))
+            yield self.issue_row(rng, user, book, issued, returned=True)
+
+    def issue_row(self, rng, user: int, book: int, issued, returned: bool) -> dict:
+        created_at = datetime.datetime.combine(issued, datetime.time(12))
+        return {
+            "id": random_id(rng),
+            "book_id": make_id(self.seed, "book", book),
+            "user_id": make_id(self.seed, "user", user),
+            "issue_date": issued,
+            "return_date": issued + datetime.timedelta(days=14),
+            "returned": returned,
+            "created_at": created_at,
+            "updated_at": created_at,
+        }
+
+    def log_rows(self) -> Iterator[dict]:
+        rng = self.rng("logs")
+        events = [event for event, _ in LOG_EVENTS]
+        weights = list(itertools.accumulate(weight for _, weight in LOG_EVENTS))
+        for _ in range(self.logs):
+            event = rng.choices(events, cum_weights=weights)[0]
+            user = make_id(self.seed, "user", rng.randrange(self.users))
+            created_at = self.past_datetime(rng, 3 * 365)
+            yield {
+                "id": random_id(rng),
+                "event_type": event,
+                "description": f"User {user} {event.lower()} {random_id(rng)}",
+                "timestamp": created_at.date(),
+                "created_at": created_at,
+                "updated_at": created_at,
+            }
+
+    async def load(self, model, rows: Iterable[dict], total: int) -> None:
+        started = time.perf_counter()
+        written = 0
+        async with async_session_maker() as session:
+            repository = DatabaseRepository(model, session)
+            for batch in batched(rows, self.batch_size):
+                written += await repository.copy(batch)
+                elapsed = time.perf_counter() - started
+                print(
+                    f"\r{model.__tablename__}: {written}/{total} "
+                    f"({written / elapsed:,.0f} rows/s)",
+                    end="",
+                    flush=True,
+                )
+            await session.commit()
+        elapsed = time.perf_counter() - started
+        print(f"\r{model.__tablename__}: {written} rows in {elapsed:.1f}s")
+
+    async def run(self, truncate: bool) -> None:
+        engine = init_engine()
+        tables = [model.__tablename__ for model in (Logs, Issue, Books, Authors, User)]
+        async with engine.begin() as conn:
+            if truncate:
+                await conn.execute(text(f"TRUNCATE {', '.join(tables)} CASCADE"))
+            else:
+                for table in tables:
+                    query = text(f"SELECT 1 FROM {table} LIMIT 1")
+                    if (await conn.execute(query)).first():
+                        raise SystemExit(
+                            f"Таблица {table} не пуста, используйте --truncate"
+                        )
+
+        self.plan_active_issues()
+        await self.load(Authors, self.author_rows(), self.authors)
+        await self.load(Books, self.book_rows(), self.books)
+        await self.load(User, self.user_rows(), self.users)
+        await self.load(Issue, self.issue_rows(), max(self.issues, len(self.active)))
+        await self.load(Logs, self.log_rows(), self.logs)
+
+        async with engine.connect() as conn:
+            for table in tables:
+                await conn.execute(text(f"ANALYZE {table}"))
+            await conn.commit()
+        await dispose_engine()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument(
+        "--as-of",
+        type=datetime.date.fromisoformat,
+        default=datetime.date.today(),
+        help="дата, относительно которой строятся даты (YYYY-MM-DD)",
+    )
+    parser.add_argument("--scale", type=float, default=1.0, help="множитель объемов")
+    parser.add_argument("--authors", type=int, default=100_000)
+    parser.add_argument("--books", type=int, default=1_000_000)
+    parser.add_argument("--users", type=int, default=500_000)
+    parser.add_argument("--issues", type=int, default=3_000_000)
+    parser.add_argument("--logs", type=int, default=20_000_000)
+    parser.add_argument("--batch-size", type=int, default=50_000)
+    parser.add_argument("--password", default="password", help="пароль всех юзеров")
+    parser.add_argument("--truncate", action="store_true", help="очистить таблицы")
+    args = parser.parse_args()
+    asyncio.run(Seeder(args).run(args.truncate))
@@ -0,0 +1,66 @@
+import pytest
+from sqlalchemy import select
+
+from API_for_library.models.books import Books
+from API_for_library.models.user import User
+
+pytestmark = pytest.mark.anyio
+
+
+async def scalar(session, query):
+    return (await session.execute(query)).scalar_one()
+
+
+async def test_issue_book_decrements_counter(client, session, make_user, make_book):
+    reader = await make_user()
+    book = await make_book(counter=2)
+
+    response = await client.post(
+        f"/issues/{book.id}", params={"user_id": str(reader.id)}
+    )
+
+    assert response.status_code == 200, response.text
+    issue = response.json()
+    assert issue["id"]
+    assert issue["book_id"] == str(book.id)
+    assert issue["returned"] is False
+    assert await scalar(session, select(Books.counter).where(Books.id == book.id)) == 1
+    books_count = select(User.books_count).where(User.id == reader.id)
+    assert await scalar(session, books_count) == 1
+
+
+async def test_issue_last_copy_only_once(client, session, make_user, make_book):
+    first, second = await make_user(), await make_user()
+    book = await make_book(counter=1)
+
+    ok = await client.post(f"/issues/{book.id}", params={"user_id": str(first.id)})
+    failed = await client.post(f"/issues/{book.id}", params={"user_id": str(second.id)})
+
+    assert ok.status_code == 200, ok.text
+    assert failed.status_code == 400
+    assert "not available" in failed.json()["detail"]
+    assert await scalar(session, select(Books.counter).where(Books.id == book.id)) == 0
+
+
+async def test_return_batch_returns_full_issue(client, session, make_user, make_book):
+    reader = await make_user()
+    book = await make_book(counter=2)
+    issued = await client.post(f"/issues/{book.id}", params={"user_id": str(reader.id)})
+    issue = issued.json()
+    unknown = "00000000-0000-0000-0000-000000000000"
+
+    response = await client.post(
+        "/issues/return/batch", json={"issue_ids": [issue["id"], unknown]}
+    )
+
+    assert response.status_code == 200, response.text
+    ok, missing = response.json()["results"]
+    assert ok["ok"] is True
+    assert ok["issue"] == {**issue, "returned": True}
+    assert missing == {
+        "id": unknown,
+        "ok": False,
+        "issue": None,
+        "error": "Issue not found",
+    }
+    assert await scalar(session, select(Books.counter).where(Books.id == book.id)) == 2
@@ -0,0 +1,51 @@
+import pytest
+
+pytestmark = pytest.mark.anyio
+
+
+async def get_json(client, url: str, **params):
+    response = await client.get(url, params=params)
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+async def test_list_books_fields(client, make_book):
+    book = await make_book()
+
+    page = await get_json(client, "/books/", fields="id,title")
+
+    assert page["items"] == [{"id": str(book.id), "title": book.title}]
+
+
+async def test_search_books_fields(client, make_book):
+    book = await make_book(title="Война и мир")
+
+    page = await get_json(client, "/books/search", q="война", fields="id,title")
+
+    assert page["items"] == [{"id": str(book.id), "title": book.title}]
+
+
+async def test_get_book_fields(client, make_book):
+    book = await make_book()
+
+    data = await get_json(client, f"/books/{book.id}", fields="id,author_id")
+
+    assert data == {"id": str(book.id), "author_id": str(book.author_id)}
+
+
+async def test_get_author_fields(client, make_author):
+    author = await make_author()
+
+    data = await get_json(
+        client, "/author/author_id", author_id=str(author.id), fields="id,name"
+    )
+
+    assert data == {"id": str(author.id), "name": author.name}
+
+
+async def test_get_all_users_fields(client, make_user):
+    reader = await make_user()
+
+    users = await get_json(client, "/user/all", fields="id,email")
+
+    assert users == [{"id": str(reader.id), "email": reader.email}]
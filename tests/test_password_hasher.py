@@ -0,0 +1,39 @@
+import asyncio
+
+import pytest
+from prometheus_client import REGISTRY
+
+from API_for_library.app.auth.generate_password import PasswordHasher
+
+pytestmark = pytest.mark.anyio
+
+
+def gauges() -> tuple:
+    return (
+        REGISTRY.get_sample_value("password_hash_in_flight"),
+        REGISTRY.get_sample_value("password_hash_queued"),
+    )
+
+
+async def test_hasher_exports_load():
+    hasher = PasswordHasher("thread", workers=1)
+    before_in_flight, before_queued = gauges()
+    try:
+        tasks = [asyncio.create_task(hasher.hash("secret")) for _ in range(3)]
+        await asyncio.sleep(0.01)
+
+        assert hasher.stats()["in_flight"] == 1
+        assert hasher.stats()["queued"] == 2
+        assert gauges() == (before_in_flight + 1, before_queued + 2)
+
+        await asyncio.gather(*tasks)
+        assert gauges() == (before_in_flight, before_queued)
+    finally:
+        hasher.shutdown()
+
+
+async def test_password_hasher_stats_route(client):
+    response = await client.get("/monitoring/password-hasher")
+
+    assert response.status_code == 200, response.text
+    assert response.json()["in_flight"] == 0
@@ -0,0 +1,99 @@
+import pytest
+from sqlalchemy import select
+
+from API_for_library.cache import TTLCache
+from API_for_library.db.repository import DatabaseRepository
+from API_for_library.db.session import run_after_commit
+from API_for_library.models.user import User
+
+pytestmark = pytest.mark.anyio
+
+
+def user_row(name: str, **values) -> dict:
+    return {
+        "email": f"{name}@example.com",
+        "username": name,
+        "password_hash": b"-",
+        "role": "reader",
+        **values,
+    }
+
+
+async def users_by_email(session) -> dict:
+    result = await session.execute(select(User.email, User.username, User.books_count))
+    return {row.email: row for row in result}
+
+
+async def test_bulk_create_in_chunks(session):
+    repository = DatabaseRepository(User, session)
+
+    created = await repository.bulk_create(
+        [user_row(f"reader{index}") for index in range(5)], chunk_size=2
+    )
+    await session.commit()
+
+    assert created == 5
+    assert len(await users_by_email(session)) == 5
+
+
+async def test_bulk_update_invalidates_after_commit(session, make_user):
+    first, second = await make_user(), await make_user()
+    cache = TTLCache(maxsize=10, ttl=60)
+    repository = DatabaseRepository(User, session, cache)
+    await repository.get(first.id)
+    await repository.get(second.id)
+
+    updated = await repository.bulk_update(
+        [{"id": first.id, "books_count": 2}, {"id": second.id, "books_count": 3}]
+    )
+
+    assert updated == 2
+    assert len(cache) == 2
+    await session.commit()
+    await run_after_commit(session)
+    assert len(cache) == 0
+    rows = await users_by_email(session)
+    assert rows[first.email].books_count == 2
+    assert rows[second.email].books_count == 3
+
+
+async def test_upsert_updates_on_conflict(session, make_user):
+    existing = await make_user()
+    cache = TTLCache(maxsize=10, ttl=60)
+    repository = DatabaseRepository(User, session, cache)
+    await repository.get(existing.id)
+
+    upserted = await repository.upsert(
+        [
+            user_row("new"),
+            user_row(existing.username, email=existing.email, books_count=1),
+            user_row(existing.username, email=existing.email, books_count=4),
+        ],
+        conflict_columns=["email"],
+        update_columns=["books_count"],
+    )
+
+    assert upserted == 2
+    assert len(cache) == 1
+    await session.commit()
+    await run_after_commit(session)
+    assert len(cache) == 0
+    rows = await users_by_email(session)
+    assert rows[existing.email].books_count == 4
+    assert rows["new@example.com"].books_count == 0
+
+
+async def test_upsert_without_update_columns_does_nothing(session, make_user):
+    existing = await make_user()
+    repository = DatabaseRepository(User, session)
+
+    await repository.upsert(
+        [user_row("other", email=existing.email)],
+        conflict_columns=["email"],
+        update_columns=[],
+    )
+    await session.commit()
+
+    rows = await users_by_email(session)
+    assert list(rows) == [existing.email]
+    assert rows[existing.email].username == existing.username
@@ -0,0 +1,17 @@
+import json
+
+from API_for_library.db.slow_queries import SlowQueryLog
+
+
+def test_logs_sharing_path_write_each_record_once(tmp_path):
+    path = str(tmp_path / "slow" / "queries.log")
+    primary = SlowQueryLog(threshold_ms=100, path=path)
+    replica = SlowQueryLog(threshold_ms=100, path=path)
+
+    primary._write({"statement": "SELECT 1"})
+    replica._write({"statement": "SELECT 2"})
+
+    with open(path, encoding="utf-8") as file:
+        lines = [json.loads(line)["query"]["statement"] for line in file]
+    assert lines == ["SELECT 1", "SELECT 2"]
+    assert len(primary._get_writer().handlers) == 1